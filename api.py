@@ -0,0 +1,189 @@
+"""Headless JSON API for prescription analysis.
+
+    gunicorn -w 4 -b 0.0.0.0:8000 'api:create_app()'     # one process per worker
+    python api.py --port 8000                             # single-process development server
+
+Endpoints:
+    GET  /health                          -> {"ok": true, "models": {...}, "drugs": N, "catalog_version": N}
+    GET  /metrics                         -> Prometheus text for this worker (see metrics.py)
+    GET  /drugs/<name>                    -> {"drug": {...}, "confidence": ..}
+    GET  /drugs/<name>/alternates?limit=2 -> {"drug": "..", "alternates": [..]}
+    GET  /drugs/<name>/summary?variant=   -> {"drug": "..", "variant": "..", "summary": ".."}
+    GET  /search?q=anxiety+with+panic&k=5 -> {"query": "..", "results": [{"drug": "..", "score": ..}]}
+    GET  /check?drugs=Omep,Clopivas       -> {"drugs": [..], "unmatched": [..], "findings": [..]}
+    POST /prescriptions                   -> {"medicines": [..], "drugs": [..], "unmatched": [..], "findings": [..]}
+         image as multipart field "image" or as the raw body; ?summaries=0 skips generation
+
+Drug names are resolved like OCR tokens, so "Nap4" finds Napa. Each worker
+loads the catalog and starts loading the models once at boot, then serves
+every request from them; workers are sync, so a worker runs one generate call
+at a time. Each worker also watches the catalog for edits (catalog_reload.py)
+and picks them up between requests. Do not use gunicorn --preload: the
+background model loading and the watcher would not survive the fork.
+
+With several workers, run model_server.py and set MEDIBOT_MODEL_SERVER so
+they share one copy of flan-t5 and easyocr (and its cross-request batching)
+instead of each loading its own. The API processes are then stateless and
+can be replicated behind a load balancer.
+"""
+import argparse
+
+from flask import Flask, jsonify, request
+from werkzeug.exceptions import HTTPException
+
+from catalog_reload import get_live_catalog
+from drug_matcher import resolve
+from interactions import check_prescription, get_interaction_index
+from metrics import METRICS
+from ocr_service import get_ocr_service
+from prescription import extract_medicines_from_image, get_item
+from semantic_search import get_encoder, get_search_index, search
+from summarizer import DETAILED_VARIANTS, VARIANTS, pick_variant
+from warmup import get_summarizer, get_warmup
+
+
+def alternate_names(catalog, item, limit=2):
+    # Same lookup as prescription.find_alternates, minus its UI placeholder text
+    return [alt["Drug Name"] for alt in catalog.alternates(item["Drug Name"], limit)]
+
+
+def create_app():
+    app = Flask(__name__)
+    # Shared by every request this worker serves
+    warmup = get_warmup()
+    live = get_live_catalog()
+    interactions = get_interaction_index()
+    ocr = get_ocr_service()
+    summarizer = get_summarizer(warmup)
+
+    def lookup(name):
+        # One catalog snapshot per request, so a hot reload never lands halfway through it
+        catalog, matcher = live.snapshot()
+        item, confidence = resolve(name, catalog, matcher)
+        if item is None:
+            _, error = get_item(name, catalog)
+            return None, (jsonify({"error": error}), 404)
+        return (item, confidence, catalog), None
+
+    @app.errorhandler(Exception)
+    def failed(e):
+        if isinstance(e, HTTPException):
+            return e
+        return jsonify({"error": str(e)}), 500
+
+    @app.get("/health")
+    def health():
+        return jsonify({"ok": True, "models": warmup.status(), "drugs": len(live.catalog),
+                        "catalog_version": live.version, "ocr": ocr.stats()})
+
+    @app.get("/metrics")
+    def metrics():
+        return METRICS.render(), 200, {"Content-Type": "text/plain; version=0.0.4"}
+
+    @app.get("/drugs/<name>")
+    def drug(name):
+        found, error = lookup(name)
+        if error:
+            return error
+        item, confidence, _ = found
+        return jsonify({"drug": dict(item), "confidence": confidence})
+
+    @app.get("/drugs/<name>/alternates")
+    def alternates(name):
+        found, error = lookup(name)
+        if error:
+            return error
+        item, _, catalog = found
+        limit = request.args.get("limit", 2, type=int)
+        return jsonify({"drug": item["Drug Name"], "alternates": alternate_names(catalog, item, limit)})
+
+    @app.get("/drugs/<name>/summary")
+    def summary(name):
+        found, error = lookup(name)
+        if error:
+            return error
+        item = found[0]
+        variant = request.args.get("variant") or pick_variant(DETAILED_VARIANTS, item)
+        if variant not in VARIANTS:
+            return jsonify({"error": f"Unknown variant '{variant}'", "variants": sorted(VARIANTS)}), 400
+        return jsonify({"drug": item["Drug Name"], "variant": variant,
+                        "summary": summarizer.summarize(item, variant)})
+
+    @app.get("/search")
+    def condition_search():
+        query = request.args.get("q", "").strip()
+        if not query:
+            return jsonify({"error": "Pass the condition as ?q="}), 400
+        index = get_search_index()
+        if index is None:
+            return jsonify({"error": "Search index not built; run python semantic_search.py"}), 503
+        k = request.args.get("k", 5, type=int)
+        results = search(query, index, get_encoder(index.model_name), live.catalog, k)
+        return jsonify({"query": query, "results": [
+            {"drug": item["Drug Name"], "score": round(score, 4), "indication": item["Indication"]}
+            for item, score in results
+        ]})
+
+    @app.get("/check")
+    def check():
+        catalog, matcher = live.snapshot()
+        items, unmatched = [], []
+        for name in request.args.get("drugs", "").split(","):
+            if not name.strip():
+                continue
+            item, _ = resolve(name, catalog, matcher)
+            if item is None:
+                unmatched.append(name.strip())
+            elif item not in items:
+                items.append(item)
+        return jsonify({"drugs": [item["Drug Name"] for item in items], "unmatched": unmatched,
+                        "findings": check_prescription(items, interactions, catalog)})
+
+    @app.post("/prescriptions")
+    def prescriptions():
+        image = request.files["image"].read() if "image" in request.files else request.get_data()
+        if not image:
+            return jsonify({"error": "Send the prescription image as multipart field 'image' or as the body"}), 400
+        catalog, matcher = live.snapshot()
+        medicines = extract_medicines_from_image(image, ocr, catalog, matcher)
+
+        items, unmatched = [], []
+        for name in medicines:
+            item, _ = get_item(name, catalog)
+            if item is None:
+                unmatched.append(name)
+            else:
+                items.append(item)
+
+        summaries = [None] * len(items)
+        if items and request.args.get("summaries", "1") != "0":
+            variants = [pick_variant(DETAILED_VARIANTS, item) for item in items]
+            # One batched pass for every summary that is not cached yet
+            for i, text in summarizer.summarize_many(items, variants):
+                summaries[i] = text
+
+        return jsonify({
+            "medicines": medicines,
+            "drugs": [
+                {"drug": dict(item),
+                 "alternates": alternate_names(catalog, item),
+                 "summary": text}
+                for item, text in zip(items, summaries)
+            ],
+            "unmatched": unmatched,
+            "findings": check_prescription(items, interactions, catalog),
+        })
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medi-Bot prescription analysis API (development server)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    create_app().run(host=args.host, port=args.port, threaded=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,110 @@
 import streamlit as st
-import json
-import random
-import pandas as pd
-import base64
-import numpy as np
-import easyocr
 from PIL import Image
-from transformers import T5Tokenizer, T5ForConditionalGeneration
 from streamlit_cropper import st_cropper   # ✅ NEW
+from medicine_catalog import MedicineCatalog
+from drug_matcher import DrugMatcher, resolve
+from catalog_reload import get_live_catalog
+from summarizer import BRIEF_VARIANTS, SUMMARY_MODE, pick_variant
+from ocr_service import get_ocr_service, ocr_cache_key
+from warmup import get_warmup, readiness_badge
+from pipeline import get_pipeline, poll_until
+from static_assets import BANNER_SIZE, asset_url
+from metrics import METRICS, admin_panel, serve_metrics
+from semantic_search import get_encoder, get_search_index, search
+from interactions import check_prescription, get_interaction_index, show_findings
 
 # --- 1. CONFIG & SETUP ---
 st.set_page_config(page_title="Medi-Bot 💊", layout="wide", initial_sidebar_state="collapsed")
 
-def get_base64_image(image_path):
-    try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except:
-        return ""
-
 # --- 2. LOAD AI MODEL, OCR & DATA ---
-@st.cache_resource
-def load_resources():
-    tokenizer = T5Tokenizer.from_pretrained("google/flan-t5-base")
-    model = T5ForConditionalGeneration.from_pretrained("google/flan-t5-base")
-    reader = easyocr.Reader(['en'], gpu=False)
-    return tokenizer, model, reader
-
-@st.cache_data
 def load_medicine_data():
+    # Current catalog and matcher snapshot; edits to the catalog show up on the next rerun
     try:
-        with open("medicine_data_cleaned.json", "r") as f:
-            data = json.load(f)
-        df = pd.DataFrame(data)
-        return df.dropna(subset=["Drug Name"])
+        return get_live_catalog().snapshot()
     except FileNotFoundError:
         st.error("Data file 'medicine_data_cleaned.json' not found.")
-        return pd.DataFrame()
+        return MedicineCatalog([]), DrugMatcher([])
 
-tokenizer, model, reader = load_resources()
-df = load_medicine_data()
+# flan-t5 and easyocr load on background threads; the page renders without waiting
+warmup = get_warmup()
+ocr = get_ocr_service()
+catalog, matcher = load_medicine_data()
 
 # --- 3. AI PROMPT & GENERATION LOGIC ---
-def build_prompt(item):
-    variants = [
-        f"Write a medical summary for {item['Drug Name']} by {item['Company Name']}. Include uses and pregnancy safety: {item['Indication']}. Safety: {item['Use in pregnancy']}",
-        f"Summarize this medicine: {item['Drug Name']}. Indication: {item['Indication']}. Side effects: {item['Side Effects']}. Pregnancy: {item['Use in pregnancy']}",
-    ]
-    return random.choice(variants)
-
-def generate_summary_text(prompt):
-    input_ids = tokenizer(prompt, return_tensors="pt", truncation=True).input_ids
-    output_ids = model.generate(
-        input_ids,
-        max_length=320,
-        num_beams=5,
-        no_repeat_ngram_size=3,
-        repetition_penalty=1.2,
-        early_stopping=True
-    )
-    return tokenizer.decode(output_ids[0], skip_special_tokens=True)
+# Known drugs come from the batch_summaries.py artifact; the rest are cached per
+# (drug, prompt variant, generation params) across sessions and restarts.
+# OCR and generation run on the pipeline's shared worker pools, never in this thread.
+pipeline = get_pipeline()
+serve_metrics()
+
+def alternates_text(item, limit=3):
+    names = [alt['Drug Name'] for alt in catalog.alternates(item['Drug Name'], limit)]
+    return ", ".join(names) if names else "No alternates available in our dataset"
+
+def search_conditions(query, k=3):
+    """Drugs whose indication matches a free-text query like "anxiety with panic"."""
+    try:
+        index = get_search_index()
+        if index is None:
+            # Index not built (python semantic_search.py); name search only
+            return []
+        with st.spinner("Searching by condition..."):
+            results = search(query, index, get_encoder(index.model_name), catalog, k)
+    except Exception as e:
+        st.warning(f"Condition search is unavailable: {e}")
+        return []
+    if results:
+        st.caption("No drug by that name. Closest matches by indication: "
+                   + ", ".join(f"{item['Drug Name']} ({score:.2f})" for item, score in results))
+    return [item for item, _ in results]
+
+def render_card(item, summary):
+    return f"""
+    <div class="med-card">
+        <h2>💊 {item['Drug Name']}</h2>
+        <p><i>By {item['Company Name']}</i></p>
+        <p>{summary}</p>
+        <hr>
+        <p><b>Indication:</b> {item['Indication']}</p>
+        <p><b>Active Ingredient:</b> {item['Active Ingredient']}</p>
+        <p><b>Alternatives:</b> {alternates_text(item)}</p>
+        <p><b>Pregnancy:</b> {item['Use in pregnancy']}</p>
+        <p><b>Side Effects:</b> {item['Side Effects']}</p>
+    </div>
+    """
+
+def show_summaries(job):
+    """Result cards for a SummaryJob, refreshed by a fragment until its worker is done."""
+    polling = not job.finished()
+
+    @st.fragment(run_every=0.4 if polling else None)
+    def cards():
+        if job.waiting and not pipeline.schedule(job):
+            st.caption("⏳ The server is busy, your summaries are queued...")
+        if job.error is not None:
+            st.error(f"Could not generate summaries: {job.error}")
+        pending = "Generating summary..." if warmup.ready("model") else "Loading AI model, summary will follow..."
+        for i, item in enumerate(job.items):
+            summary = job.texts[i]
+            if summary is None:
+                summary = f"<i>⏳ {pending}</i>"
+            elif not job.done[i]:
+                summary += " ▌"
+            elif job.stats[i]:
+                stats = job.stats[i]
+                summary += (f"<br><small style='color:#888'>⚡ first token {stats['ttft']:.2f}s · "
+                            f"{stats['tokens_per_sec']:.1f} tokens/s</small>")
+            with METRICS.stage("render"):
+                st.markdown(render_card(item, summary), unsafe_allow_html=True)
+        if polling and job.finished():
+            # One last full run draws the final cards and stops the polling
+            st.rerun()
+
+    cards()
 
 # --- 4. CUSTOM STYLING ---
-banner_base64 = get_base64_image("banner.png")
-promo_base64 = get_base64_image("promo.png")
+# Served from static/ rather than inlined into every rerun's payload
+banner_url = asset_url("banner.png", BANNER_SIZE)
 
 st.markdown(f"""
 <style>
@@ -77,7 +118,7 @@ st.markdown(f"""
     .logo span {{ color:#00aaff; }}
     .banner {{
         width:100%; aspect-ratio:4/1;
-        background:url('data:image/png;base64,{banner_base64}') no-repeat center;
+        background:url('{banner_url}') no-repeat center;
         background-size:contain; border-radius:15px; margin:20px 0;
     }}
     .med-card {{
@@ -102,6 +143,7 @@ st.markdown('<div class="banner"></div>', unsafe_allow_html=True)
 col_sidebar, col_main = st.columns([1, 3.5])
 
 with col_sidebar:
+    readiness_badge(warmup)
     st.markdown("### Categories")
     st.page_link("pages/Personal_Care.py", label="Personal Care", icon="🧴")
     st.page_link("pages/Skin_Care.py", label="Skin Care", icon="✨")
@@ -113,16 +155,21 @@ with col_sidebar:
 
 with col_main:
     st.subheader("🔍 Find Medicine Information")
-    search_query = st.text_input("Enter drug name(s)", placeholder="Napa, Sergel...")
+    search_query = st.text_input("Enter drug name(s) or a condition", placeholder="Napa, Sergel... or anxiety with panic")
+    # Template summaries are composed in one step; only model modes have anything to stream
+    stream_summaries = SUMMARY_MODE != "template" and st.toggle(
+        "Stream summaries as they are written", value=True,
+        help="Faster first words using greedy decoding instead of beam search")
 
     found_meds = []
 
     if search_query:
         for drug in search_query.split(","):
-            drug = drug.strip().lower()
-            match = df[df["Drug Name"].str.lower() == drug]
-            if not match.empty:
-                found_meds.append(match.iloc[0])
+            item = catalog.get(drug)
+            if item is not None:
+                found_meds.append(item)
+        if not found_meds:
+            found_meds = search_conditions(search_query)
 
     # --- Upload Prescription ---
     st.markdown("""
@@ -135,53 +182,99 @@ with col_main:
     uploaded_file = st.file_uploader("Upload Image", type=["jpg","png","jpeg"], label_visibility="collapsed")
 
     if uploaded_file:
-        image = Image.open(uploaded_file).convert("RGB")
+        image_bytes = uploaded_file.getvalue()
+        with METRICS.stage("decode"):
+            image = Image.open(uploaded_file).convert("RGB")
 
         st.markdown("### ✂️ Crop Prescription (optional but recommended)")
-        cropped_img = st_cropper(
-            image,
-            realtime_update=True,
-            box_color="#00aaff",
-            aspect_ratio=None
-        )
+        with METRICS.stage("crop"):
+            cropped_img, crop_box = st_cropper(
+                image,
+                realtime_update=True,
+                box_color="#00aaff",
+                aspect_ratio=None,
+                return_type="both"
+            )
 
         st.image(cropped_img, caption="Cropped Image Used for OCR", width=350)
 
-        with st.spinner("🔍 Reading prescription..."):
-            img_np = np.array(cropped_img)
-            results = reader.readtext(img_np)
+        # Every drag of the crop box reruns the script. OCR only runs for a new upload's
+        # first crop or when the user confirms; any crop seen before is served from cache.
+        crop_key = ocr_cache_key(image_bytes, crop_box)
+        image_key = crop_key.split(":")[0]
+        if st.session_state.get("ocr_image") != image_key:
+            st.session_state["ocr_image"] = image_key
+            st.session_state["ocr_crop"] = crop_key
+        if st.button("🔍 Read prescription", help="Run OCR on the current crop"):
+            st.session_state["ocr_crop"] = crop_key
+            st.session_state.pop("ocr_job", None)
 
-            for (_, text, prob) in results:
-                if prob < 0.4:
-                    continue
-                word = text.strip().lower()
-                match = df[df["Drug Name"].str.lower() == word]
-                if not match.empty:
-                    item = match.iloc[0]
-                    if not any(m['Drug Name'] == item['Drug Name'] for m in found_meds):
-                        found_meds.append(item)
+        results = ocr.cached_result(crop_key)
+        ocr_job = st.session_state.get("ocr_job")
+        if (results is None and ocr_job and ocr_job[0] == crop_key and ocr_job[1].done()
+                and ocr_job[1].exception() is None):
+            # Finished, but other sessions already pushed it out of the shared OCR cache
+            results = ocr_job[1].result()
+        reading = False
+        if results is None and st.session_state["ocr_crop"] == crop_key:
+            results = []
+            if ocr_job and ocr_job[0] == crop_key and ocr_job[1].done():
+                st.error(f"Could not read the prescription: {ocr_job[1].exception()}")
+            else:
+                # OCR runs on the shared OCR pool; this session polls instead of blocking
+                reading = True
+                future = pipeline.submit_ocr(crop_key, cropped_img)
+                if future is None:
+                    st.warning("⏳ The server is busy reading other prescriptions, yours is queued...")
+                    poll_until(lambda: pipeline.submit_ocr(crop_key, cropped_img) is not None)
+                else:
+                    st.session_state["ocr_job"] = (crop_key, future)
+                    st.info("🔍 Reading prescription...")
+                    poll_until(future.done)
+        elif results is None:
+            st.info("Crop changed. Press **Read prescription** to scan the new area.")
+            results = ocr.cached_result(st.session_state["ocr_crop"]) or []
+        elif ocr_job and ocr_job[0] == crop_key:
+            del st.session_state["ocr_job"]
+            ocr_stats = ocr.stats()
+            st.caption(f"OCR took {ocr_stats['last_seconds']:.2f}s after "
+                       f"{ocr_stats['preprocess_seconds']:.2f}s preprocessing "
+                       f"(reader loaded once in {ocr_stats['load_seconds']:.1f}s)")
 
-        if not found_meds:
+        if results and st.session_state.get("ocr_counted") != crop_key:
+            # Count each OCR result once, not on every rerun that re-reads it from cache
+            st.session_state["ocr_counted"] = crop_key
+            METRICS.inc("ocr_tokens_total", len(results))
+            METRICS.inc("ocr_tokens_rejected_total", sum(1 for _, _, prob in results if prob < 0.4))
+        for (_, text, prob) in results:
+            if prob < 0.4:
+                continue
+            # Exact name first, then the closest catalog name for OCR slips like "Nap4"
+            item, _ = resolve(text, catalog, matcher)
+            if item is not None:
+                if not any(m['Drug Name'] == item['Drug Name'] for m in found_meds):
+                    found_meds.append(item)
+
+        if not found_meds and not reading:
             st.info("No medicines detected. Try cropping more tightly or search manually.")
 
     # --- Results ---
     if found_meds:
         st.divider()
         st.subheader("Results Found")
-        for item in found_meds:
-            summary = generate_summary_text(build_prompt(item))
-            st.markdown(f"""
-            <div class="med-card">
-                <h2>💊 {item['Drug Name']}</h2>
-                <p><i>By {item['Company Name']}</i></p>
-                <p>{summary}</p>
-                <hr>
-                <p><b>Indication:</b> {item['Indication']}</p>
-                <p><b>Active Ingredient:</b> {item['Active Ingredient']}</p>
-                <p><b>Pregnancy:</b> {item['Use in pregnancy']}</p>
-                <p><b>Side Effects:</b> {item['Side Effects']}</p>
-            </div>
-            """, unsafe_allow_html=True)
+        if len(found_meds) > 1:
+            st.markdown("#### 🩺 Prescription check")
+            show_findings(check_prescription(found_meds, get_interaction_index(), catalog))
+        # Cached cards are drawn straight away; misses are generated on the worker pool
+        # (batched, or streamed token by token with greedy decoding) and polled in
+        job_key = (tuple(m['Drug Name'] for m in found_meds), stream_summaries)
+        if st.session_state.get("summary_job_key") != job_key:
+            variants = [pick_variant(BRIEF_VARIANTS, item) for item in found_meds]
+            st.session_state["summary_job"] = pipeline.submit_summaries(found_meds, variants, stream_summaries)
+            st.session_state["summary_job_key"] = job_key
+        show_summaries(st.session_state["summary_job"])
+
+admin_panel()
 
 # --- 7. FOOTER ---
 st.markdown("""
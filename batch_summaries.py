@@ -0,0 +1,115 @@
+"""Offline pre-generation of summaries for the whole medicine catalog.
+
+    python batch_summaries.py --workers 4 --batch-size 8 --variants all
+
+Every (drug, prompt variant) pair is generated once with batched flan-t5
+calls and appended to a JSONL artifact that app.py and flaskapp.py load at
+startup. Re-running skips pairs already present, so an interrupted run
+resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import time
+from multiprocessing import get_context
+
+from inference_backends import BACKENDS
+from medicine_catalog import MedicineCatalog
+from summarizer import (VARIANT_SETS, Summarizer, build_prompt, generation_params,
+                        length_buckets, load_model, load_tokenizer)
+from summary_cache import ARTIFACT_FILE, load_artifact
+
+# Per-worker state, set up once by _init_worker
+_summarizer = None
+
+
+def _init_worker(cores_queue, threads, backend):
+    global _summarizer
+    import torch
+
+    cores = cores_queue.get()
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    torch.set_num_threads(threads)
+    tokenizer, model = load_model(backend=backend)
+    _summarizer = Summarizer(tokenizer, model, backend=backend)
+
+
+def _run_batch(batch):
+    # batch: [(drug_key, variant, prompt, item)]
+    summaries = _summarizer.generate_batch([prompt for _, _, prompt, _ in batch])
+    # Output that breaks the contract is stored as its template, like a live miss would be
+    return [
+        {"drug": drug, "variant": variant, "params": _summarizer.params,
+         "summary": _summarizer.accept(item, variant, summary)}
+        for (drug, variant, _, item), summary in zip(batch, summaries)
+    ]
+
+
+def pending_jobs(catalog, variants, params, done):
+    jobs = []
+    for key, item in catalog.by_name.items():
+        for variant in variants:
+            if (key, variant, params) not in done:
+                jobs.append((key, variant, build_prompt(item, variant), item))
+    return jobs
+
+
+def split_cores(workers):
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else []
+    if not cores:
+        return [None] * workers
+    per_worker = max(1, len(cores) // workers)
+    return [set(cores[i * per_worker:(i + 1) * per_worker]) or {cores[i % len(cores)]}
+            for i in range(workers)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate Medi-Bot summaries for the whole catalog.")
+    parser.add_argument("--variants", default="all", choices=sorted(VARIANT_SETS))
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--output", default=ARTIFACT_FILE)
+    parser.add_argument("--catalog", default="medicine_data_cleaned.json")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                        help="inference backend (default: MEDIBOT_BACKEND or torch)")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N jobs (smoke runs)")
+    args = parser.parse_args()
+
+    # Only the tokenizer is needed in the parent, for length bucketing
+    tokenizer = load_tokenizer()
+    params = generation_params(backend=args.backend)
+
+    catalog = MedicineCatalog.from_json(args.catalog)
+    done = load_artifact(args.output)
+    jobs = pending_jobs(catalog, VARIANT_SETS[args.variants], params, done)[: args.limit]
+    print(f"{len(done)} summaries already in {args.output}, {len(jobs)} to generate.")
+    if not jobs:
+        return
+
+    batches = [[jobs[i] for i in bucket]
+               for bucket in length_buckets([p for _, _, p, _ in jobs], tokenizer, args.batch_size)]
+
+    ctx = get_context("spawn")
+    cores_queue = ctx.Queue()
+    core_sets = split_cores(args.workers)
+    for cores in core_sets:
+        cores_queue.put(cores)
+    threads = len(core_sets[0]) if core_sets[0] else 1
+
+    start = time.perf_counter()
+    written = 0
+    with ctx.Pool(args.workers, initializer=_init_worker, initargs=(cores_queue, threads, args.backend)) as pool, \
+            open(args.output, "a", encoding="utf-8") as out:
+        for rows in pool.imap_unordered(_run_batch, batches):
+            for row in rows:
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            # Flush per batch so a killed run keeps everything finished so far
+            out.flush()
+            written += len(rows)
+            elapsed = time.perf_counter() - start
+            print(f"{written}/{len(jobs)} summaries  ({written / elapsed:.2f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Latency, peak RSS and output parity of the flan-t5 inference backends.
+
+Run from the repo root:
+
+    python benchmarks/bench_backends.py --prompts 20
+    python benchmarks/bench_backends.py --check 0.9   # exit 1 if a backend drifts from fp32
+
+Each backend runs in its own spawned process so RSS numbers do not bleed
+into each other. Parity is measured against the fp32 torch outputs.
+"""
+import argparse
+import difflib
+import os
+import resource
+import statistics
+import sys
+import time
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference_backends import BACKENDS  # noqa: E402
+from medicine_catalog import MedicineCatalog  # noqa: E402
+from summarizer import MODE_VARIANTS, Summarizer, build_prompt, load_model  # noqa: E402
+
+
+def run_backend(backend, prompts):
+    start = time.perf_counter()
+    tokenizer, model = load_model(backend=backend)
+    load_seconds = time.perf_counter() - start
+    summarizer = Summarizer(tokenizer, model, backend=backend)
+
+    outputs, latencies = [], []
+    for prompt in prompts:
+        start = time.perf_counter()
+        outputs.append(summarizer.generate_summary_text(prompt))
+        latencies.append(time.perf_counter() - start)
+    # ru_maxrss is KiB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return dict(outputs=outputs, latencies=latencies, load=load_seconds, rss=peak_rss_mb)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    parser.add_argument("--prompts", type=int, default=20)
+    parser.add_argument("--check", type=float, default=None,
+                        help="minimum mean similarity to fp32 output; exit 1 below it")
+    args = parser.parse_args()
+
+    items = list(MedicineCatalog.from_json().by_name.values())[: args.prompts]
+    variants = MODE_VARIANTS["generate"]["brief"] + MODE_VARIANTS["generate"]["detailed"]
+    prompts = [build_prompt(item, variants[i % len(variants)]) for i, item in enumerate(items)]
+
+    ctx = get_context("spawn")
+    results = {}
+    for backend in args.backends.split(","):
+        with ctx.Pool(1) as pool:
+            results[backend] = pool.apply(run_backend, (backend, prompts))
+
+    reference = results.get("torch")
+    print(f"{'backend':12s} {'load(s)':>8s} {'p50(s)':>8s} {'mean(s)':>8s} {'rss(MB)':>8s} "
+          f"{'exact':>6s} {'similar':>8s}")
+    failed = False
+    for backend, r in results.items():
+        exact = similar = float("nan")
+        if reference is not None:
+            pairs = list(zip(reference["outputs"], r["outputs"]))
+            exact = sum(a == b for a, b in pairs) / len(pairs)
+            similar = statistics.mean(difflib.SequenceMatcher(None, a, b).ratio() for a, b in pairs)
+            if args.check is not None and similar < args.check:
+                failed = True
+        print(f"{backend:12s} {r['load']:8.1f} {statistics.median(r['latencies']):8.2f} "
+              f"{statistics.mean(r['latencies']):8.2f} {r['rss']:8.0f} {exact:6.0%} {similar:8.3f}")
+
+    if failed:
+        print(f"Parity check failed: a backend is below {args.check} similarity to torch fp32.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
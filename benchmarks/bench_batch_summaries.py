@@ -0,0 +1,40 @@
+"""Wall-clock time of serial vs batched summaries for 1-5 drug prescriptions.
+
+Run from the repo root:  python benchmarks/bench_batch_summaries.py
+(downloads google/flan-t5-base on first run)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from medicine_catalog import MedicineCatalog  # noqa: E402
+from summarizer import Summarizer, build_prompt, load_model  # noqa: E402
+
+VARIANT = "brief-summary"
+
+
+def main():
+    items = list(MedicineCatalog.from_json().by_name.values())[:5]
+    tokenizer, model = load_model()
+    summarizer = Summarizer(tokenizer, model)
+    summarizer.generate_summary_text(build_prompt(items[0], VARIANT))  # warm-up
+
+    print(" drugs   serial(s)   batched(s)   speedup")
+    for n in range(1, len(items) + 1):
+        subset = items[:n]
+
+        start = time.perf_counter()
+        for item in subset:
+            summarizer.generate_summary_text(build_prompt(item, VARIANT))
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        list(summarizer.summarize_many(subset, [VARIANT] * n, batch_size=n))
+        batched = time.perf_counter() - start
+
+        print(f"{n:6d}   {serial:9.2f}   {batched:10.2f}   {serial / batched:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Compare the old per-token pandas filter with MedicineCatalog lookups.
+
+Run from the repo root:  python benchmarks/bench_catalog.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog_store import read_source, write_catalog  # noqa: E402
+from medicine_catalog import DATA_FILE, MedicineCatalog  # noqa: E402
+
+
+def make_tokens(names, count, miss_ratio=0.7, seed=0):
+    # OCR output is mostly noise ("Rx", "1+0+1", "7 days"), with a few hits
+    rng = random.Random(seed)
+    noise = ["rx", "tab", "1+0+1", "after meal", "7 days", "dr. rahman", "bp 120/80"]
+    return [
+        rng.choice(noise) if rng.random() < miss_ratio else rng.choice(names).lower()
+        for _ in range(count)
+    ]
+
+
+def pandas_lookup(df, tokens):
+    found = []
+    for word in tokens:
+        match = df[df["Drug Name"].str.lower() == word]
+        if not match.empty:
+            found.append(match.iloc[0])
+    return found
+
+
+def catalog_lookup(catalog, tokens):
+    found = []
+    for word in tokens:
+        item = catalog.get(word)
+        if item is not None:
+            found.append(item)
+    return found
+
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def load_footprint(load):
+    """(best-of-5 seconds, peak Python heap MB) of loading the catalog."""
+    seconds, _ = timed(load)
+    # tracemalloc slows allocation down, so measure memory in a separate run
+    tracemalloc.start()
+    load()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 2**20
+
+
+def startup_report():
+    binary = os.path.join(tempfile.mkdtemp(), "catalog.bin")
+    write_catalog(read_source(DATA_FILE), binary)
+
+    def json_frame():
+        with open(DATA_FILE, "r") as f:
+            return pd.DataFrame(json.load(f)).dropna(subset=["Drug Name"])
+
+    print("\nstartup (time, peak heap):")
+    for label, load in [
+        ("json -> DataFrame", json_frame),
+        ("json -> MedicineCatalog", lambda: MedicineCatalog.from_json(DATA_FILE)),
+        ("binary -> MedicineCatalog", lambda: MedicineCatalog.from_binary(binary)),
+    ]:
+        seconds, peak_mb = load_footprint(load)
+        print(f"  {label:26s} {seconds * 1e3:8.2f} ms  {peak_mb:6.2f} MB")
+
+
+def main():
+    with open(DATA_FILE, "r") as f:
+        data = json.load(f)
+
+    build_df, df = timed(lambda: pd.DataFrame(data).dropna(subset=["Drug Name"]))
+    build_cat, catalog = timed(lambda: MedicineCatalog(data))
+    print(f"rows: {len(df)}")
+    print(f"build  pandas DataFrame : {build_df * 1e3:8.2f} ms")
+    print(f"build  MedicineCatalog  : {build_cat * 1e3:8.2f} ms")
+
+    names = df["Drug Name"].tolist()
+    for count in (1, 10, 30, 60):
+        tokens = make_tokens(names, count)
+        t_pd, found_pd = timed(pandas_lookup, df, tokens)
+        t_cat, found_cat = timed(catalog_lookup, catalog, tokens)
+        assert len(found_pd) == len(found_cat)
+        print(
+            f"{count:3d} tokens  pandas {t_pd * 1e3:8.2f} ms   "
+            f"catalog {t_cat * 1e3:8.4f} ms   x{t_pd / max(t_cat, 1e-9):,.0f}"
+        )
+
+    startup_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Incremental catalog updates versus rebuilding the catalog and matcher.
+
+Run from the repo root:  python benchmarks/bench_catalog_reload.py
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drug_matcher import DrugMatcher  # noqa: E402
+from medicine_catalog import DATA_FILE, MedicineCatalog, normalize_name  # noqa: E402
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def edits(catalog, count, seed=0):
+    # Half edited existing drugs, half new ones
+    rng = random.Random(seed)
+    upserts = []
+    for i, item in enumerate(rng.sample(list(catalog.by_name.values()), count)):
+        record = dict(item)
+        if i % 2:
+            record["Drug Name"] = f"{record['Drug Name']} Plus {i}"
+        record["Indication"] += " (revised)"
+        upserts.append(record)
+    return upserts
+
+
+def main():
+    with open(DATA_FILE, "r") as f:
+        data = json.load(f)
+    catalog = MedicineCatalog(data)
+    matcher = DrugMatcher(catalog.names())
+
+    def rebuild():
+        new = MedicineCatalog(list(catalog.by_name.values()) + upserts)
+        return new, DrugMatcher(new.names())
+
+    def incremental():
+        added = [normalize_name(r["Drug Name"]) for r in upserts]
+        return catalog.updated(upserts), matcher.updated([k for k in added if k not in catalog.by_name])
+
+    print(f"drugs: {len(catalog.by_name)}")
+    for count in (1, 10, 100):
+        upserts = edits(catalog, count)
+        t_full, _ = timed(rebuild)
+        t_inc, (new_catalog, new_matcher) = timed(incremental)
+        assert len(new_catalog.by_name) == len(catalog.by_name) + count // 2
+        print(f"{count:4d} changed  rebuild {t_full * 1e3:8.2f} ms   incremental {t_inc * 1e3:7.2f} ms"
+              f"   x{t_full / max(t_inc, 1e-9):,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+"""End-to-end benchmark and load test with machine-readable JSON output.
+
+Run from the repo root:
+    python benchmarks/bench_e2e.py fixtures                      # synthetic prescriptions -> benchmarks/fixtures/
+    python benchmarks/bench_e2e.py stages -o stages.json         # time each pipeline stage in-process
+    python benchmarks/bench_e2e.py load --url http://127.0.0.1:8000 --sessions 8 --duration 60 -o load.json
+    python benchmarks/bench_e2e.py compare old.json new.json     # exit 1 if any p95 regressed
+
+`stages` times catalog loading, name matching, OCR (reader.readtext behind
+the preprocessor) and generate_summary_text for every build_prompt variant.
+Stages whose dependencies or models are unavailable are reported as skipped.
+`load` drives concurrent synthetic sessions against api.py (start it with
+gunicorn or python api.py). Each session uploads a fixture prescription and
+then looks up, summarizes and fetches alternates for the drugs it contains.
+
+Every timed operation reports n, p50/p95/p99/mean in ms and throughput per
+second; the report also carries peak RSS (this process, plus the server's if
+--server-pid is given).
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_matcher import corrupt  # noqa: E402
+from benchmarks.bench_ocr import image_paths  # noqa: E402
+from medicine_catalog import DATA_FILE, MedicineCatalog  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DOSAGE_FORMS = ["TAB", "CAP", "SYR", "INJ"]
+
+
+def summarize_latencies(seconds, wall=None):
+    if not seconds:
+        return {"n": 0}
+    ms = np.asarray(seconds) * 1000
+    return {
+        "n": len(seconds),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "throughput_per_s": round(len(seconds) / (wall if wall else sum(seconds)), 3),
+    }
+
+
+def timed(fn, args_list):
+    latencies = []
+    start = time.perf_counter()
+    for args in args_list:
+        t = time.perf_counter()
+        fn(*args)
+        latencies.append(time.perf_counter() - t)
+    return summarize_latencies(latencies, time.perf_counter() - start)
+
+
+def peak_rss_mb(pid=None):
+    if pid is None:
+        # ru_maxrss is in KB on Linux
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "cpus": os.cpu_count(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+# --- Fixtures ---
+
+def make_fixtures(folder, count, seed=0):
+    """Synthetic typed prescriptions plus a labels.json in the bench_ocr.py format."""
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    names = [n["Drug Name"] for n in MedicineCatalog.from_json().by_name.values() if n["Drug Name"].isalpha()]
+    font = ImageFont.load_default(size=34)
+    os.makedirs(folder, exist_ok=True)
+    labels = {}
+    for i in range(count):
+        drugs = rng.sample(names, rng.randint(1, 5))
+        image = Image.new("RGB", (1240, 1754), "white")
+        draw = ImageDraw.Draw(image)
+        draw.text((80, 80), "Dr. Medi-Bot Clinic        Rx", fill="black", font=font)
+        y = 260
+        for drug in drugs:
+            draw.text((100, y), f"{rng.choice(DOSAGE_FORMS)} {drug}", fill="black", font=font)
+            draw.text((700, y), rng.choice(["1+0+1", "0+0+1", "1+1+1"]), fill="black", font=font)
+            y += rng.randint(90, 140)
+        # A slight tilt, like a phone photo of the pad
+        image = image.rotate(rng.uniform(-2, 2), expand=True, fillcolor="white")
+        name = f"rx_{i:03d}.jpg"
+        image.save(os.path.join(folder, name), quality=85)
+        labels[name] = drugs
+    with open(os.path.join(folder, "labels.json"), "w") as f:
+        json.dump(labels, f, indent=1)
+    return labels
+
+
+def load_labels(folder):
+    path = os.path.join(folder, "labels.json")
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+# --- In-process stage timings ---
+
+def bench_stages(args):
+    report = {"kind": "stages", "environment": environment(), "stages": {}}
+    stages = report["stages"]
+
+    stages["catalog_load_json"] = timed(lambda: MedicineCatalog.from_json(DATA_FILE), [()] * args.repeat)
+    from catalog_store import CATALOG_BIN, is_fresh
+
+    if is_fresh(DATA_FILE, CATALOG_BIN):
+        stages["catalog_load_binary"] = timed(lambda: MedicineCatalog.from_binary(CATALOG_BIN), [()] * args.repeat)
+    else:
+        stages["catalog_load_binary"] = {"skipped": f"{CATALOG_BIN} missing or stale"}
+    catalog = MedicineCatalog.from_json(DATA_FILE)
+
+    from drug_matcher import DrugMatcher, resolve
+
+    start = time.perf_counter()
+    matcher = DrugMatcher(catalog.names())
+    stages["matcher_build"] = summarize_latencies([time.perf_counter() - start])
+    rng = random.Random(0)
+    names = [n for n in catalog.names() if len(n) >= 4]
+    tokens = [corrupt(n, rng) for n in rng.sample(names, min(500, len(names)))]
+    stages["name_matching"] = timed(lambda t: resolve(t, catalog, matcher), [(t,) for t in tokens])
+
+    images = image_paths(args.images)[: args.ocr_images]
+    if importlib.util.find_spec("easyocr") is None:
+        stages["ocr_readtext"] = {"skipped": "easyocr is not installed"}
+    else:
+        if not images:
+            stages["ocr_readtext"] = {"skipped": f"no images in {args.images} (run the fixtures command)"}
+        else:
+            from image_preprocess import Preprocessor
+            from ocr_service import OCRService, to_array
+
+            arrays = [to_array(p) for p in images]
+            preprocessor = Preprocessor()
+            stages["ocr_preprocess"] = timed(preprocessor, [(a,) for a in arrays])
+            ocr = OCRService().warm()
+            prepared = [preprocessor(a)[0] for a in arrays]
+            stages["ocr_readtext"] = timed(lambda a: ocr.readtext(a, preprocess=False), [(a,) for a in prepared])
+            stages["ocr_load_seconds"] = round(ocr.load_seconds, 3)
+
+    if args.skip_generate:
+        stages["generate"] = {"skipped": "--skip-generate"}
+    else:
+        try:
+            from summarizer import PROMPTS, Summarizer, build_prompt, load_model
+
+            tokenizer, model = load_model(backend=args.backend)
+        except ImportError as e:
+            stages["generate"] = {"skipped": f"model unavailable: {e}"}
+        else:
+            summarizer = Summarizer(tokenizer, model, backend=args.backend)
+            items = list(catalog.by_name.values())[: args.generate_items]
+            summarizer.generate_summary_text(build_prompt(items[0], next(iter(PROMPTS))))  # warm-up
+            for variant in PROMPTS:
+                stages[f"generate[{variant}]"] = timed(
+                    summarizer.generate_summary_text, [(build_prompt(item, variant),) for item in items]
+                )
+
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+# --- Load test against api.py ---
+
+def _request(url, body=None, content_type=None, timeout=600):
+    headers = {"Content-Type": content_type} if content_type else {}
+    request = urllib.request.Request(url, data=body, headers=headers)
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def _multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: application/octet-stream\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class LoadTest:
+    def __init__(self, url, images, labels, summaries=True):
+        self.url = url.rstrip("/")
+        self.images = [(os.path.basename(p), open(p, "rb").read()) for p in images]
+        self.labels = labels
+        self.summaries = summaries
+        self.latencies = {}
+        self.errors = {}
+        self.sessions = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds=None, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies.setdefault(endpoint, []).append(seconds)
+            else:
+                self.errors.setdefault(endpoint, {}).setdefault(error, 0)
+                self.errors[endpoint][error] += 1
+
+    def call(self, endpoint, path, body=None, content_type=None):
+        start = time.perf_counter()
+        try:
+            result = _request(self.url + path, body, content_type)
+        except urllib.error.HTTPError as e:
+            self.record(endpoint, error=f"HTTP {e.code}")
+            return None
+        except Exception as e:
+            self.record(endpoint, error=type(e).__name__)
+            return None
+        self.record(endpoint, time.perf_counter() - start)
+        return result
+
+    def session(self, rng):
+        """One synthetic user: upload a prescription, then look at each drug found."""
+        drugs = []
+        if self.images:
+            name, data = rng.choice(self.images)
+            body, content_type = _multipart("image", name, data)
+            query = "" if self.summaries else "?summaries=0"
+            result = self.call("POST /prescriptions", "/prescriptions" + query, body, content_type)
+            if result:
+                drugs = [d["drug"]["Drug Name"] for d in result["drugs"]]
+            if not drugs:
+                drugs = self.labels.get(name, [])
+        if not drugs:
+            drugs = rng.sample(list(self.labels_flat()) or ["Sergel", "Napa"], 1)
+        for drug in drugs:
+            quoted = urllib.parse.quote(drug)
+            self.call("GET /drugs/<name>", f"/drugs/{quoted}")
+            self.call("GET /drugs/<name>/alternates", f"/drugs/{quoted}/alternates")
+            if self.summaries:
+                self.call("GET /drugs/<name>/summary", f"/drugs/{quoted}/summary")
+        with self._lock:
+            self.sessions += 1
+
+    def labels_flat(self):
+        return {d for drugs in self.labels.values() for d in drugs}
+
+    def run(self, sessions, duration, max_sessions, seed=0):
+        deadline = time.monotonic() + duration
+        started = [0]
+
+        def worker(index):
+            rng = random.Random(seed + index)
+            while time.monotonic() < deadline:
+                with self._lock:
+                    if max_sessions and started[0] >= max_sessions:
+                        return
+                    started[0] += 1
+                self.session(rng)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(sessions)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - start
+
+
+def bench_load(args):
+    images = image_paths(args.images)
+    labels = load_labels(args.images)
+    health = _request(args.url.rstrip("/") + "/health")
+    test = LoadTest(args.url, images, labels, summaries=not args.no_summaries)
+    wall = test.run(args.sessions, args.duration, args.max_sessions)
+
+    all_latencies = [s for values in test.latencies.values() for s in values]
+    report = {
+        "kind": "load",
+        "environment": environment(),
+        "target": {"url": args.url, "health": health},
+        "config": {"sessions": args.sessions, "duration_s": args.duration, "images": len(images),
+                   "summaries": not args.no_summaries},
+        "wall_seconds": round(wall, 3),
+        "completed_sessions": test.sessions,
+        "sessions_per_s": round(test.sessions / wall, 3) if wall else 0.0,
+        "stages": {endpoint: summarize_latencies(values, wall) for endpoint, values in test.latencies.items()},
+        "all_requests": summarize_latencies(all_latencies, wall),
+        "errors": test.errors,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if args.server_pid:
+        report["server_peak_rss_mb"] = peak_rss_mb(args.server_pid)
+    return report
+
+
+# --- Regression check ---
+
+def compare(baseline, current, tolerance):
+    """Stages whose p95 grew by more than `tolerance` (a fraction) over the baseline."""
+    regressions = {}
+    for stage, old in baseline.get("stages", {}).items():
+        new = current.get("stages", {}).get(stage)
+        if not isinstance(old, dict) or not isinstance(new, dict) or "p95_ms" not in old or "p95_ms" not in new:
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions[stage] = {"baseline_p95_ms": old["p95_ms"], "p95_ms": new["p95_ms"],
+                                  "change": round(new["p95_ms"] / old["p95_ms"] - 1, 3)}
+    return regressions
+
+
+def write(report, output):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medi-Bot end-to-end benchmark and load test")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fixtures = commands.add_parser("fixtures", help="write synthetic prescription images and labels.json")
+    fixtures.add_argument("folder", nargs="?", default=FIXTURES)
+    fixtures.add_argument("--count", type=int, default=20)
+    fixtures.add_argument("--seed", type=int, default=0)
+
+    stages = commands.add_parser("stages", help="time each pipeline stage in-process")
+    stages.add_argument("--images", default=FIXTURES)
+    stages.add_argument("--repeat", type=int, default=10, help="catalog loads to time")
+    stages.add_argument("--ocr-images", type=int, default=10)
+    stages.add_argument("--generate-items", type=int, default=5, help="drugs per prompt variant")
+    stages.add_argument("--backend", default=None)
+    stages.add_argument("--skip-generate", action="store_true")
+    stages.add_argument("-o", "--output", default=None)
+
+    load = commands.add_parser("load", help="concurrent synthetic sessions against api.py")
+    load.add_argument("--url", default="http://127.0.0.1:8000")
+    load.add_argument("--images", default=FIXTURES)
+    load.add_argument("--sessions", type=int, default=4, help="concurrent sessions")
+    load.add_argument("--duration", type=float, default=30, help="seconds to keep starting sessions")
+    load.add_argument("--max-sessions", type=int, default=0, help="stop after this many sessions (0: no limit)")
+    load.add_argument("--no-summaries", action="store_true", help="skip generation (OCR and lookups only)")
+    load.add_argument("--server-pid", type=int, default=None, help="also report this process's peak RSS")
+    load.add_argument("-o", "--output", default=None)
+
+    check = commands.add_parser("compare", help="compare two reports; exit 1 on p95 regressions")
+    check.add_argument("baseline")
+    check.add_argument("current")
+    check.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 growth, e.g. 0.2 = 20%%")
+
+    args = parser.parse_args()
+    if args.command == "fixtures":
+        labels = make_fixtures(args.folder, args.count, args.seed)
+        print(f"Wrote {len(labels)} prescriptions to {args.folder}")
+    elif args.command == "stages":
+        write(bench_stages(args), args.output)
+    elif args.command == "load":
+        write(bench_load(args), args.output)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.tolerance)
+        print(json.dumps({"regressions": regressions}, indent=2))
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Prescription check: adjacency lookups versus scanning an interactions DataFrame per pair.
+
+Run from the repo root:  python benchmarks/bench_interactions.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import combinations
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from interactions import InteractionIndex, check_prescription  # noqa: E402
+from medicine_catalog import load_catalog, normalize_name  # noqa: E402
+
+
+def pair_frame(index):
+    # The same rules as one row per ordered ingredient pair, the way a table lookup would hold them
+    rows = [(a, b, severity, effect) for a, row in index.pairs.items() for b, (severity, effect) in row.items()]
+    return pd.DataFrame(rows, columns=["a", "b", "severity", "effect"])
+
+
+def scan(items, index, frame, catalog):
+    """Per pair of drugs, filter the frame for every ingredient pair."""
+    names = [frozenset().union(*(index.canonical(i) for i in catalog.ingredients_of[normalize_name(item["Drug Name"])]))
+             for item in items]
+    hits = []
+    for x, y in combinations(names, 2):
+        for a in x:
+            for b in y:
+                found = frame[(frame["a"] == a) & (frame["b"] == b)]
+                hits += found["effect"].tolist()
+    return hits
+
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2, 5, 10, 20])
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    index = InteractionIndex.from_file()
+    frame = pair_frame(index)
+    # Drugs the rules know about, so the scan has real pairs to look at
+    known = [catalog.by_name[key] for key in catalog.names()
+             if any(index.canonical(i) for i in catalog.ingredients_of[key])]
+    rng = random.Random(0)
+    print(f"{len(index.pairs)} ingredients, {len(frame)} ordered pairs, {len(known)} catalog drugs covered")
+    for size in args.sizes:
+        items = rng.sample(known, size)
+        t_index = timed(check_prescription, items, index, catalog)
+        t_scan = timed(scan, items, index, frame, catalog, repeat=1)
+        print(f"{size:3d} drugs  adjacency {t_index * 1e3:7.3f} ms   DataFrame scan {t_scan * 1e3:8.1f} ms   "
+              f"x{t_scan / t_index:.0f}")
+
+
+if __name__ == "__main__":
+    main()
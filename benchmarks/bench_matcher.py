@@ -0,0 +1,67 @@
+"""Per-token latency and recall of DrugMatcher against a linear Levenshtein scan.
+
+Run from the repo root:  python benchmarks/bench_matcher.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drug_matcher import DrugMatcher, edit_distance  # noqa: E402
+from medicine_catalog import MedicineCatalog  # noqa: E402
+
+SWAPS = {"a": "4", "o": "0", "l": "1", "s": "5", "b": "8", "e": "c", "n": "m"}
+
+
+def corrupt(name, rng):
+    # One OCR-style slip: look-alike swap, dropped letter or doubled letter
+    i = rng.randrange(len(name))
+    kind = rng.choice(["swap", "drop", "double"])
+    if kind == "swap" and name[i] in SWAPS:
+        return name[:i] + SWAPS[name[i]] + name[i + 1:]
+    if kind == "drop" and len(name) > 5:
+        return name[:i] + name[i + 1:]
+    return name[:i] + name[i] + name[i:]
+
+
+def linear_best(names, token, max_distance=2):
+    best = None
+    for name in names:
+        d = edit_distance(token, name, max_distance)
+        if d <= max_distance and (best is None or d < best[1]):
+            best = (name, d)
+    return best
+
+
+def main():
+    catalog = MedicineCatalog.from_json()
+    names = [n for n in catalog.names() if len(n) >= 4]
+
+    start = time.perf_counter()
+    matcher = DrugMatcher(catalog.names())
+    print(f"index build: {(time.perf_counter() - start) * 1e3:.1f} ms, {len(matcher.index):,} keys")
+
+    rng = random.Random(0)
+    truth = rng.sample(names, 300)
+    tokens = [corrupt(n, rng) for n in truth]
+
+    start = time.perf_counter()
+    hits = [matcher.best(t) for t in tokens]
+    per_token = (time.perf_counter() - start) / len(tokens)
+    recall = sum(1 for h, n in zip(hits, truth) if h and h[0] == n) / len(truth)
+    exact = sum(1 for t in tokens if t in catalog) / len(tokens)
+
+    start = time.perf_counter()
+    for t in tokens[:50]:
+        linear_best(names, t)
+    linear = (time.perf_counter() - start) / 50
+
+    print(f"exact-match recall : {exact:.1%}")
+    print(f"fuzzy recall       : {recall:.1%}")
+    print(f"DrugMatcher        : {per_token * 1e3:.3f} ms/token")
+    print(f"linear scan        : {linear * 1e3:.3f} ms/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""easyocr latency and drug-name recall, with and without preprocessing.
+
+Run from the repo root:  python benchmarks/bench_ocr.py path/to/prescriptions/
+
+If the folder has a labels.json ({"image.jpg": ["Napa", "Sergel"], ...}) recall
+is measured against it; otherwise every catalog drug found counts as a hit.
+Preprocessing stays off in the apps (MEDIBOT_OCR_PREPROCESS=1 turns it on)
+until this shows equal recall at lower latency on real prescriptions.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drug_matcher import DrugMatcher, resolve  # noqa: E402
+from image_preprocess import TEXT_HEIGHT, Preprocessor  # noqa: E402
+from medicine_catalog import MedicineCatalog, normalize_name  # noqa: E402
+from ocr_service import OCRService  # noqa: E402
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png")
+
+
+def image_paths(folder):
+    paths = []
+    for pattern in IMAGE_PATTERNS:
+        paths.extend(glob.glob(os.path.join(folder, pattern)))
+    return sorted(paths)
+
+
+def found_drugs(results, catalog, matcher):
+    found = set()
+    for _, text, prob in results:
+        if prob < 0.4:
+            continue
+        item, _ = resolve(text, catalog, matcher)
+        if item is not None:
+            found.add(normalize_name(item["Drug Name"]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", help="folder of prescription images")
+    parser.add_argument("--text-height", type=int, default=TEXT_HEIGHT)
+    args = parser.parse_args()
+
+    paths = image_paths(args.folder)
+    if not paths:
+        sys.exit(f"No images found in {args.folder}")
+    labels_path = os.path.join(args.folder, "labels.json")
+    labels = {}
+    if os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = {k: {normalize_name(n) for n in v} for k, v in json.load(f).items()}
+
+    catalog = MedicineCatalog.from_json()
+    matcher = DrugMatcher(catalog.names())
+    ocr = OCRService(preprocessor=Preprocessor(text_height=args.text_height)).warm()
+    print(f"reader load : {ocr.load_seconds:.2f} s (paid once per process)\n")
+    print(f"{'image':28s} {'raw(s)':>7s} {'prep(s)':>8s} {'ocr(s)':>7s} {'raw hits':>9s} {'prep hits':>10s}")
+
+    totals = {"raw": 0.0, "prep": 0.0, "raw_hits": 0, "prep_hits": 0, "expected": 0}
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        name = os.path.basename(path)
+
+        start = time.perf_counter()
+        raw = found_drugs(ocr.readtext(data, preprocess=False), catalog, matcher)
+        raw_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        prep = found_drugs(ocr.readtext(data), catalog, matcher)
+        prep_seconds = time.perf_counter() - start
+
+        expected = labels.get(name)
+        raw_hits = len(raw & expected) if expected is not None else len(raw)
+        prep_hits = len(prep & expected) if expected is not None else len(prep)
+        totals["raw"] += raw_seconds
+        totals["prep"] += prep_seconds
+        totals["raw_hits"] += raw_hits
+        totals["prep_hits"] += prep_hits
+        totals["expected"] += len(expected or ())
+        print(f"{name[:28]:28s} {raw_seconds:7.2f} {prep_seconds:8.2f} {ocr.last_seconds:7.2f} "
+              f"{raw_hits:9d} {prep_hits:10d}")
+
+    print(f"\ntotal OCR time : raw {totals['raw']:.2f}s  preprocessed {totals['prep']:.2f}s "
+          f"({totals['raw'] / max(totals['prep'], 1e-9):.2f}x)")
+    if totals["expected"]:
+        print(f"recall         : raw {totals['raw_hits'] / totals['expected']:.1%}  "
+              f"preprocessed {totals['prep_hits'] / totals['expected']:.1%}")
+    else:
+        print(f"drugs found    : raw {totals['raw_hits']}  preprocessed {totals['prep_hits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Speedup of tiled multi-process OCR over a single readtext call.
+
+Run from the repo root:
+
+    python benchmarks/bench_ocr_tiles.py path/to/prescriptions/ --tiles 2,4,8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmarks.bench_ocr import image_paths  # noqa: E402
+from ocr_service import OCRService, to_array  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", help="folder of prescription images")
+    parser.add_argument("--tiles", default="2,4,8", help="comma-separated strip counts to try")
+    parser.add_argument("--no-preprocess", action="store_true", help="OCR the full-resolution images")
+    args = parser.parse_args()
+
+    paths = image_paths(args.folder)
+    if not paths:
+        sys.exit(f"No images found in {args.folder}")
+    images = [to_array(open(path, "rb").read()) for path in paths]
+    preprocess = not args.no_preprocess
+    print(f"{len(images)} images, {os.cpu_count()} cores")
+
+    ocr = OCRService().warm()
+    if preprocess:
+        from image_preprocess import Preprocessor
+        ocr.preprocessor = Preprocessor()
+
+    def run(tiles):
+        start = time.perf_counter()
+        texts = 0
+        for img in images:
+            texts += len(ocr.readtext(img, preprocess=preprocess, tiles=tiles))
+        return time.perf_counter() - start, texts
+
+    baseline, base_texts = run(0)
+    print(f"{'single':>8s} {baseline:8.2f}s  {base_texts:5d} boxes")
+    for tiles in [int(t) for t in args.tiles.split(",")]:
+        run(tiles)  # spawn the pool and load the per-worker readers outside the timing
+        elapsed, texts = run(tiles)
+        print(f"{tiles:>6d}x  {elapsed:8.2f}s  {texts:5d} boxes  speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
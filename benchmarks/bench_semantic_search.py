@@ -0,0 +1,84 @@
+"""Top-k cosine search over a memory-mapped index as the catalog grows.
+
+Uses synthetic unit vectors drawn around random topic centres, so no
+encoder is needed; the numbers cover the search step only (add the
+encoder's few ms per query). Recall is measured against exact search.
+
+Run from the repo root:  python benchmarks/bench_semantic_search.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from semantic_search import SemanticIndex  # noqa: E402
+
+DIM = 384
+
+
+def unit(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def embeddings(rng, rows, topics=200, spread=0.6):
+    # Drugs cluster by indication, as real sentence embeddings do
+    centres = rng.standard_normal((topics, DIM))
+    return unit(centres[rng.integers(topics, size=rows)] + spread * rng.standard_normal((rows, DIM)))
+
+
+def full_sort(index, queries, k):
+    # Score and sort every drug per query, the obvious loop
+    results = []
+    for query in queries:
+        scores = np.asarray(index.vectors) @ query
+        results.append([index.keys[i] for i in np.argsort(-scores)[:k]])
+    return results
+
+
+def recall(found, exact):
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, exact)])
+
+
+def timed(fn, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1249, 10000, 100000])
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    tmp = tempfile.mkdtemp()
+    for size in args.sizes:
+        vectors = embeddings(rng, size + args.batch)
+        queries, vectors = vectors[:args.batch], vectors[args.batch:]
+        path = os.path.join(tmp, f"index_{size}.json")
+        start = time.perf_counter()
+        SemanticIndex.build(vectors, [f"drug {i}" for i in range(size)], "synthetic").save(path)
+        t_build = time.perf_counter() - start
+        index = SemanticIndex.load(path)
+
+        t_one, _ = timed(index.search, queries[:1], args.k, -1.0)
+        t_batch, batched = timed(index.search, queries, args.k, -1.0)
+        t_sort, exact = timed(full_sort, index, queries, args.k)
+        kind = f"{len(index.centroids)} clusters" if index.centroids is not None else "exact"
+        print(f"{size:7d} drugs ({kind:>12s}, built in {t_build:5.1f} s)  1 query {t_one * 1e3:6.2f} ms   "
+              f"{args.batch} batched {t_batch * 1e3 / args.batch:6.2f} ms/query   "
+              f"sort-per-query {t_sort * 1e3 / args.batch:6.2f} ms/query   "
+              f"recall@{args.k} {recall([[key for key, _ in hits] for hits in batched], exact):.3f}")
+
+
+if __name__ == "__main__":
+    main()
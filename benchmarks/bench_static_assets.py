@@ -0,0 +1,59 @@
+"""Per-rerun image cost: inline base64 data URIs vs static_assets URLs.
+
+Run from the repo root:  python benchmarks/bench_static_assets.py
+
+For each page, the bytes of image data written into the page on every rerun
+and the time to produce it, for the old read-and-encode helper, for
+static_assets with static serving on, and with it off (memoized thumbnails).
+"""
+import base64
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from static_assets import BANNER_SIZE, ROOT, THUMB_SIZE, _asset_url  # noqa: E402
+
+PAGES = {
+    "app.py": [("banner.png", BANNER_SIZE), ("promo.png", None)],
+    "Baby_Care": [(p, THUMB_SIZE) for p in sorted(glob.glob("Baby/*.jpg"))[:6]],
+    "Skin_Care": [(p, THUMB_SIZE) for p in sorted(glob.glob("Skin/*.jpg"))[:6]],
+    "Personal_Care": [(p, THUMB_SIZE) for p in sorted(glob.glob("per/*.jpg"))[:6]],
+}
+
+
+def old_inline(path):
+    with open(os.path.join(ROOT, path), "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+def timed(fn, images, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = [fn(path, size) for path, size in images]
+    return sum(len(o) for o in out), (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    def served(static_serving):
+        def url(path, size):
+            if not size:
+                return ""  # promo.png is no longer sent at all
+            return _asset_url(path, os.path.getmtime(os.path.join(ROOT, path)), size, static_serving)
+        return url
+
+    static_on, static_off = served(True), served(False)
+    print(f"{'page':14s} {'inline KB':>10s} {'ms':>7s} {'static KB':>10s} {'ms':>7s} {'fallback KB':>12s} {'ms':>7s}")
+    for page, images in PAGES.items():
+        for fn in (static_on, static_off):
+            [fn(path, size) for path, size in images]  # build and memoize outside the timing
+        old_bytes, old_ms = timed(lambda p, s: old_inline(p), images)
+        on_bytes, on_ms = timed(static_on, images)
+        off_bytes, off_ms = timed(static_off, images)
+        print(f"{page:14s} {old_bytes / 1024:10.0f} {old_ms:7.2f} {on_bytes / 1024:10.2f} {on_ms:7.3f} "
+              f"{off_bytes / 1024:12.0f} {off_ms:7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Perceived latency: beam-search summaries vs streamed greedy summaries.
+
+Run from the repo root:  python benchmarks/bench_streaming.py
+(downloads google/flan-t5-base on first run)
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from medicine_catalog import MedicineCatalog  # noqa: E402
+from summarizer import MODE_VARIANTS, Summarizer, build_prompt, load_model  # noqa: E402
+
+# Streaming only matters for model-written summaries
+VARIANT = MODE_VARIANTS["generate"]["brief"][0]
+
+
+def main():
+    items = list(MedicineCatalog.from_json().by_name.values())[:5]
+    tokenizer, model = load_model()
+    summarizer = Summarizer(tokenizer, model)
+    summarizer.generate_summary_text(build_prompt(items[0], VARIANT))  # warm-up
+
+    print(f"{'drug':20s} {'beam total(s)':>14s} {'stream ttft(s)':>15s} {'stream total(s)':>16s} {'tok/s':>7s}")
+    for item in items:
+        prompt = build_prompt(item, VARIANT)
+        start = time.perf_counter()
+        summarizer.generate_summary_text(prompt)
+        beam = time.perf_counter() - start
+
+        stats = {}
+        for _ in summarizer.stream_summary_text(prompt, stats):
+            pass
+        print(f"{item['Drug Name'][:20]:20s} {beam:14.2f} {stats['ttft']:15.3f} "
+              f"{stats['seconds']:16.2f} {stats['tokens_per_sec']:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
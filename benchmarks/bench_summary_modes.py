@@ -0,0 +1,81 @@
+"""Summary cost per mode, and the regenerate button before and after.
+
+Run from the repo root:
+
+    python benchmarks/bench_summary_modes.py --drugs 20
+    python benchmarks/bench_summary_modes.py --template-only   # no model download
+
+template composes from the record; rephrase and generate run flan-t5 and
+report how often the output contract rejects the text. "regenerate (old)"
+is the previous loop: up to five beam-search generations with freshly
+picked prompts until one mentions pregnancy and indication.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from medicine_catalog import MedicineCatalog  # noqa: E402
+from summarizer import (MODE_VARIANTS, Summarizer, build_prompt, compose_summary,  # noqa: E402
+                        load_model, validate_summary)
+
+
+def timed(fn, items):
+    latencies, outputs = [], []
+    for item in items:
+        start = time.perf_counter()
+        outputs.append(fn(item))
+        latencies.append(time.perf_counter() - start)
+    return latencies, outputs
+
+
+def old_regenerate(summarizer, item, old_summary, max_attempts=5):
+    variants = MODE_VARIANTS["generate"]["detailed"]
+    calls = 0
+    for attempt in range(max_attempts):
+        calls += 1
+        text = summarizer.generate_summary_text(build_prompt(item, variants[attempt % len(variants)]))
+        if text.strip() != old_summary.strip() and "pregnancy" in text.lower() and "indication" in text.lower():
+            break
+    return calls
+
+
+def report(name, latencies, rejected=None):
+    line = f"{name:20s} p50 {statistics.median(latencies) * 1e3:9.2f} ms   mean {statistics.mean(latencies) * 1e3:9.2f} ms"
+    if rejected is not None:
+        line += f"   rejected by contract {rejected:.0%}"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--drugs", type=int, default=20)
+    parser.add_argument("--template-only", action="store_true")
+    args = parser.parse_args()
+
+    items = list(MedicineCatalog.from_json().by_name.values())[: args.drugs]
+    report("template", timed(lambda item: compose_summary(item, "detailed-template"), items)[0])
+    if args.template_only:
+        return
+
+    tokenizer, model = load_model()
+    summarizer = Summarizer(tokenizer, model)
+    summarizer.generate_summary_text(build_prompt(items[0], "detailed-rephrase"))  # warm-up
+    for variant in ("detailed-rephrase", "detailed-fields"):
+        latencies, outputs = timed(lambda item: summarizer.generate_summary_text(build_prompt(item, variant)), items)
+        rejected = sum(bool(validate_summary(text, item, variant)) for item, text in zip(items, outputs))
+        report(variant, latencies, rejected / len(items))
+
+    calls = []
+    latencies, _ = timed(lambda item: calls.append(old_regenerate(summarizer, item, "")), items)
+    report("regenerate (old)", latencies)
+    print(f"{'':20s} {statistics.mean(calls):.1f} generate calls per click, worst {max(calls)}")
+    report("regenerate", timed(lambda item: summarizer.regenerate(item, "detailed-template", ""), items)[0])
+    # Second click on the same drugs: the encoder outputs are reused
+    report("regenerate (again)", timed(lambda item: summarizer.regenerate(item, "detailed-template", ""), items)[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Import-time profile of each Streamlit entry point (python -X importtime).
+
+Run from the repo root:
+    python benchmarks/import_profile.py                  # current tree
+    python benchmarks/import_profile.py --rev HEAD~1     # side by side with a git revision
+
+Each script runs once in Streamlit's bare mode (no server) with background
+warmup disabled, so the numbers are what blocks the first render: total
+import time, time until the script finished, and the heaviest top-level
+imports. A revision is checked out into a temporary git worktree.
+"""
+import argparse
+import glob
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNNER = """
+import runpy, sys, time
+print("@@start", file=sys.stderr, flush=True)
+start = time.perf_counter()
+try:
+    runpy.run_path(sys.argv[1], run_name="__main__")
+    status = "ok"
+except BaseException as e:
+    status = type(e).__name__
+print(f"@@render {time.perf_counter() - start:.3f} {status}", file=sys.stderr)
+"""
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def targets(root):
+    return ["app.py", "flaskapp.py"] + sorted(
+        os.path.relpath(p, root) for p in glob.glob(os.path.join(root, "pages", "*.py"))
+    )
+
+
+def profile(root, target, timeout):
+    env = dict(os.environ, MEDIBOT_WARMUP="0", PYTHONDONTWRITEBYTECODE="1")
+    try:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", RUNNER, target],
+            cwd=root, env=env, capture_output=True, text=True, timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        return {"imports": None, "render": None, "status": f">{timeout}s", "top": []}
+
+    top_level = {}
+    render, status = None, "no output"
+    started = False
+    for line in proc.stderr.splitlines():
+        if line.startswith("@@start"):
+            # Interpreter start-up imports (site, encodings, ...) are not the script's
+            started = True
+            continue
+        if line.startswith("@@render"):
+            _, seconds, status = line.split()
+            render = float(seconds)
+            continue
+        match = LINE.match(line)
+        if started and match and not match.group(3):
+            # Only top-level imports: nested ones are already in their parent's cumulative time
+            top_level[match.group(4)] = int(match.group(2)) / 1e6
+    heaviest = sorted(top_level.items(), key=lambda kv: -kv[1])[:5]
+    return {"imports": sum(top_level.values()), "render": render, "status": status, "top": heaviest}
+
+
+def fmt(seconds):
+    return "-" if seconds is None else f"{seconds:.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rev", default=None, help="git revision to compare against")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    runs = {"current": ROOT}
+    worktree = None
+    if args.rev:
+        worktree = tempfile.mkdtemp(prefix="medibot-rev-")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, args.rev],
+                       cwd=ROOT, check=True, capture_output=True)
+        runs = {args.rev: worktree, "current": ROOT}
+
+    try:
+        names = targets(ROOT)
+        results = {label: {t: profile(root, t, args.timeout) for t in names if os.path.exists(os.path.join(root, t))}
+                   for label, root in runs.items()}
+    finally:
+        if worktree:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT, capture_output=True)
+
+    header = f"{'script':28s}" + "".join(f" {label[:12] + ' imp(s)':>18s} {'render(s)':>10s}" for label in runs)
+    print(header)
+    for t in names:
+        row = f"{t:28s}"
+        for label in runs:
+            r = results[label].get(t)
+            if r is None:
+                row += f" {'-':>18s} {'-':>10s}"
+            else:
+                render = fmt(r["render"]) if r["status"] == "ok" else f"{fmt(r['render'])}!{r['status']}"
+                row += f" {fmt(r['imports']):>18s} {render:>10s}"
+        print(row)
+
+    for label in runs:
+        print(f"\nHeaviest top-level imports ({label}):")
+        for t in names:
+            r = results[label].get(t)
+            if r and r["top"]:
+                print(f"  {t:26s} " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in r["top"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Reproducible build of the medicine catalog from registry exports.
+
+    python catalog_etl.py merged_medicine_data.csv       # -> medicine_data_cleaned.json + medicine_catalog.bin
+    python catalog_etl.py formulary.csv -o formulary.json --bin formulary.bin --chunksize 50000
+
+The CSV is read in chunks and each chunk is cleaned with column operations:
+headers are matched case-insensitively against FIELDS (plus CSV_ALIASES such
+as "Company"), values are trimmed, columns holding the same field are
+coalesced, rows without a drug name are dropped and repeated drug names
+(normalized) are dropped after the first. The normalized name keys and
+ingredient sets computed on the way are stored in the binary catalog, so
+MedicineCatalog.from_binary does not parse them again.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog_store import CATALOG_BIN, CSV_ALIASES, write_catalog
+from medicine_catalog import DATA_FILE, FIELDS, PARSER_VERSION, parse_ingredients
+
+CHUNK_ROWS = 50000
+# merged_medicine_data.csv appends a second export's Company and Use in
+# Pregnancy columns without headers; those rows leave the named ones empty
+UNNAMED_COLUMNS = ["Company Name", "Use in pregnancy"]
+
+_CANONICAL = {f.lower(): f for f in FIELDS}
+_CANONICAL.update({alias.lower(): field for alias, field in CSV_ALIASES.items()})
+
+
+def map_columns(columns, unnamed=UNNAMED_COLUMNS):
+    """{field: [source columns, in order]} and the columns that match no field."""
+    sources = {field: [] for field in FIELDS}
+    ignored = []
+    spare = list(unnamed)
+    for column in columns:
+        name = str(column).strip().lstrip("\ufeff")
+        field = _CANONICAL.get(" ".join(name.lower().split()))
+        if field is None and (not name or name.startswith("Unnamed:")) and spare:
+            field = spare.pop(0)
+        if field is None:
+            ignored.append(name)
+        else:
+            sources[field].append(column)
+    if not sources["Drug Name"]:
+        raise ValueError(f"No 'Drug Name' column among {list(columns)}")
+    return sources, ignored
+
+
+def clean_frame(df, sources, parsed, stats):
+    """One chunk -> DataFrame of FIELDS plus "key" and "ingredients" columns, deduplicated within the chunk."""
+    out = pd.DataFrame(index=df.index)
+    for field, columns in sources.items():
+        if not columns:
+            out[field] = ""
+            continue
+        values = df[columns[0]].str.strip().to_numpy()
+        for column in columns[1:]:
+            # First non-empty value wins
+            values = np.where(values == "", df[column].str.strip().to_numpy(), values)
+        out[field] = values
+
+    # Column form of medicine_catalog.normalize_name
+    key = (out["Drug Name"].str.lower()
+           .str.replace("[\u200b-\u200d\u2060\ufeff]", "", regex=True)
+           .str.replace(r"\s+", " ", regex=True)
+           .str.strip(" .,;:"))
+    named = key != ""
+    duplicate = named & key.duplicated()
+    stats["rows"] += len(df)
+    stats["dropped_unnamed"] += int((~named).sum())
+    stats["dropped_duplicates"] += int(duplicate.sum())
+
+    keep = named & ~duplicate
+    out = out[keep]
+    out["key"] = key[keep]
+
+    # Many products share an ingredient string; parse each distinct one once
+    new = [text for text in pd.unique(out["Active Ingredient"]) if text not in parsed]
+    parsed.update((text, sorted(parse_ingredients(text))) for text in new)
+    out["ingredients"] = out["Active Ingredient"].map(parsed)
+    return out
+
+
+def read_frames(path, chunksize=CHUNK_ROWS):
+    """DataFrame chunks of a CSV or JSON export, every value a string."""
+    if path.lower().endswith(".json"):
+        with open(path, "r") as f:
+            rows = json.load(f)
+        yield pd.DataFrame(rows).fillna("").astype(str)
+        return
+    yield from pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False,
+                           encoding="utf-8-sig")
+
+
+def clean(path, chunksize=CHUNK_ROWS, unnamed=UNNAMED_COLUMNS):
+    """(cleaned DataFrame, stats) for a registry export."""
+    stats = {"rows": 0, "dropped_unnamed": 0, "dropped_duplicates": 0}
+    parsed, parts = {}, []
+    sources = None
+    for df in read_frames(path, chunksize):
+        if sources is None:
+            sources, stats["ignored_columns"] = map_columns(df.columns, unnamed)
+            stats["missing_columns"] = [f for f, columns in sources.items() if not columns]
+        parts.append(clean_frame(df, sources, parsed, stats))
+    if not parts:
+        raise ValueError(f"{path} has no rows")
+    frame = pd.concat(parts, ignore_index=True)
+    # Names repeated across chunks; one hashed pass over the key column
+    duplicate = frame["key"].duplicated()
+    stats["dropped_duplicates"] += int(duplicate.sum())
+    frame = frame[~duplicate].reset_index(drop=True)
+    stats["drugs"] = len(frame)
+    stats["empty_values"] = {f: int((frame[f] == "").sum()) for f in FIELDS if f != "Drug Name"}
+    return frame, stats
+
+
+def records(frame):
+    # zip over column lists: DataFrame.to_dict boxes every value one at a time
+    columns = [frame[field].tolist() for field in FIELDS]
+    return [dict(zip(FIELDS, values)) for values in zip(*columns)]
+
+
+def build(source, json_path=DATA_FILE, bin_path=CATALOG_BIN, chunksize=CHUNK_ROWS):
+    """Clean `source` and write the catalog JSON and binary catalog (with its index); returns stats."""
+    frame, stats = clean(source, chunksize)
+    rows = records(frame)
+    # Both files are replaced by rename, never rewritten under a running app's
+    # catalog_reload poll. The binary goes first: a new JSON next to a stale
+    # binary only makes is_fresh() fall back to the JSON, never the reverse.
+    if bin_path:
+        write_catalog(rows, bin_path, index={
+            "parser": PARSER_VERSION,
+            "keys": frame["key"].tolist(),
+            "ingredients": frame["ingredients"].tolist(),
+        })
+    if json_path:
+        tmp = f"{json_path}.tmp"
+        with open(tmp, "w") as f:
+            # One write; json.dump with indent makes one per token
+            f.write(json.dumps(rows, indent=2))
+        os.replace(tmp, json_path)
+        if bin_path:
+            # Same content, so mark the binary as at least as new as the JSON
+            os.utime(bin_path)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean a medicine registry export into the Medi-Bot catalog.")
+    parser.add_argument("source", nargs="?", default="merged_medicine_data.csv", help="registry CSV or JSON")
+    parser.add_argument("-o", "--output", default=DATA_FILE, help="cleaned JSON ('' to skip)")
+    parser.add_argument("--bin", default=CATALOG_BIN, help="binary catalog with lookup index ('' to skip)")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = build(args.source, args.output, args.bin, args.chunksize)
+    elapsed = time.perf_counter() - start
+    print(f"{stats['rows']} rows -> {stats['drugs']} drugs in {elapsed:.2f}s "
+          f"({stats['dropped_duplicates']} duplicate, {stats['dropped_unnamed']} without a name)")
+    if stats["missing_columns"]:
+        print(f"missing columns (left empty): {', '.join(stats['missing_columns'])}")
+    if stats["ignored_columns"]:
+        print(f"ignored columns: {', '.join(stats['ignored_columns'])}")
+    empty = {f: n for f, n in stats["empty_values"].items() if n}
+    if empty:
+        print("empty values: " + ", ".join(f"{f} {n}" for f, n in empty.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Hot reload of the medicine catalog without restarting the apps.
+
+Two watched sources:
+    medicine_data_cleaned.json   edited in place; re-read when its mtime changes
+    catalog_changes.jsonl        append-only; one record per line adds or replaces
+                                 that drug, {"Drug Name": "X", "deleted": true}
+                                 removes it. Only the new lines are read.
+
+A background thread polls both every MEDIBOT_CATALOG_POLL seconds (0 turns
+watching off). Changed drugs are applied to copies of the lookup structures
+(MedicineCatalog.updated, DrugMatcher.updated) and the new catalog and matcher
+are swapped in with one assignment, so a session that took a snapshot keeps a
+consistent pair. Cached and pregenerated summaries of every changed drug are
+dropped.
+
+    python catalog_reload.py --compact    # fold the change log into the JSON
+"""
+import argparse
+import json
+import os
+import threading
+
+import streamlit as st
+
+from drug_matcher import DrugMatcher
+from medicine_catalog import DATA_FILE, FIELDS, load_catalog, normalize_name
+from metrics import METRICS
+from warmup import get_pregenerated, get_summary_cache
+
+CHANGES_FILE = os.environ.get("MEDIBOT_CATALOG_CHANGES", "catalog_changes.jsonl")
+POLL_SECONDS = float(os.environ.get("MEDIBOT_CATALOG_POLL", "5"))
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _record(raw):
+    return {field: (raw.get(field) or "") for field in FIELDS}
+
+
+class LiveCatalog:
+    """The current (catalog, matcher) pair plus the sources it is kept in sync with."""
+
+    def __init__(self, path=DATA_FILE, changes_path=CHANGES_FILE, on_change=None):
+        self.path = path
+        self.changes_path = changes_path
+        self.on_change = on_change
+        self.version = 0
+        # drug key -> record, or None when deleted; the change log replayed so far
+        self._overlay = {}
+        self._offset = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._mtime = _mtime(path)
+        catalog = load_catalog(path)
+        self._snapshot = (catalog, DrugMatcher(catalog.names()))
+        self._read_changes()
+        if self._overlay:
+            self._apply(self._overlay)
+
+    @property
+    def catalog(self):
+        return self._snapshot[0]
+
+    @property
+    def matcher(self):
+        return self._snapshot[1]
+
+    def snapshot(self):
+        """(catalog, matcher) from the same version; read once per request or rerun."""
+        return self._snapshot
+
+    def poll(self):
+        """Apply whatever changed in either source since the last poll; returns the changed drug keys."""
+        with self._lock:
+            changes = self._read_changes()
+            mtime = _mtime(self.path)
+            if mtime is not None and mtime != self._mtime:
+                try:
+                    with open(self.path, "r") as f:
+                        rows = json.load(f)
+                except ValueError:
+                    # Caught mid-write; the next poll sees the finished file
+                    return []
+                self._mtime = mtime
+                target = {}
+                for raw in rows:
+                    if isinstance(raw, dict) and raw.get("Drug Name"):
+                        # First record wins, as in MedicineCatalog
+                        target.setdefault(normalize_name(raw["Drug Name"]), _record(raw))
+                target.update(self._overlay)
+                changes = {key: None for key in self.catalog.by_name if key not in target}
+                changes.update(target)
+            return self._apply(changes)
+
+    def _read_changes(self):
+        # New complete lines of the change log; a partial last line waits for the next poll
+        changes = {}
+        try:
+            with open(self.changes_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < self._offset:
+                    # Truncated (e.g. by --compact): start over
+                    self._offset = 0
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return changes
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                raw = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(raw, dict) or not raw.get("Drug Name"):
+                continue
+            key = normalize_name(raw["Drug Name"])
+            changes[key] = None if raw.get("deleted") else _record(raw)
+        self._offset += end
+        self._overlay.update(changes)
+        return changes
+
+    def _apply(self, changes):
+        catalog, matcher = self._snapshot
+        upserts, deletes = [], []
+        for key, record in changes.items():
+            current = catalog.by_name.get(key)
+            if record is None:
+                if current is not None:
+                    deletes.append(key)
+            elif current is None or _record(current) != record:
+                upserts.append(record)
+        if not upserts and not deletes:
+            return []
+
+        added = [normalize_name(r["Drug Name"]) for r in upserts]
+        added = [key for key in added if key not in catalog.by_name]
+        with METRICS.stage("catalog_reload"):
+            new_catalog = catalog.updated(upserts, deletes)
+            new_matcher = matcher.updated(added, deletes)
+        # Readers pick up either the old pair or the new one, never a mix
+        self._snapshot = (new_catalog, new_matcher)
+        self.version += 1
+
+        changed = [normalize_name(r["Drug Name"]) for r in upserts] + deletes
+        METRICS.inc("catalog_changes_total", len(changed))
+        if self.on_change is not None:
+            self.on_change(changed)
+        return changed
+
+    def start(self, interval=POLL_SECONDS):
+        """Poll on a daemon thread every `interval` seconds; no-op for 0."""
+        if interval <= 0:
+            return None
+        thread = threading.Thread(target=self._watch, args=(interval,), name="catalog-reload", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except OSError:
+                # File briefly missing while being replaced; try again next round
+                continue
+
+
+def invalidate_summaries(drugs):
+    """Forget cached and pregenerated summaries of `drugs` (normalized names)."""
+    cache = get_summary_cache()
+    for drug in drugs:
+        cache.invalidate(drug)
+    pregenerated = get_pregenerated()
+    drugs = set(drugs)
+    for key in [k for k in pregenerated if k[0] in drugs]:
+        pregenerated.pop(key, None)
+
+
+@st.cache_resource(show_spinner=False)
+def get_live_catalog(path=DATA_FILE):
+    live = LiveCatalog(path, CHANGES_FILE, on_change=invalidate_summaries)
+    live.start()
+    return live
+
+
+def compact(path=DATA_FILE, changes_path=CHANGES_FILE):
+    """Rewrite the JSON with the change log applied and empty the log; returns the row count."""
+    live = LiveCatalog(path, changes_path)
+    with open(path, "r") as f:
+        rows = json.load(f)
+    out, seen = [], set()
+    for raw in rows:
+        key = normalize_name(raw.get("Drug Name")) if isinstance(raw, dict) else ""
+        if key not in live._overlay:
+            out.append(raw)
+        elif key not in seen and live._overlay[key] is not None:
+            out.append(live._overlay[key])
+        seen.add(key)
+    out += [record for key, record in live._overlay.items() if key not in seen and record is not None]
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(out, f, indent=2)
+    os.replace(tmp, path)
+    if os.path.exists(changes_path):
+        open(changes_path, "w").close()
+    return len(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the hot-reloaded Medi-Bot catalog.")
+    parser.add_argument("--compact", action="store_true", help="fold the change log into the JSON and empty it")
+    parser.add_argument("--path", default=DATA_FILE)
+    parser.add_argument("--changes", default=CHANGES_FILE)
+    args = parser.parse_args()
+
+    if args.compact:
+        count = compact(args.path, args.changes)
+        print(f"Wrote {count} records to {args.path}; {args.changes} emptied")
+    else:
+        live = LiveCatalog(args.path, args.changes)
+        print(f"{len(live.catalog.by_name)} drugs, {len(live._overlay)} pending in {args.changes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Compact columnar catalog file with memory-mapped, lazily decoded text fields.
+
+    python catalog_store.py medicine_data_cleaned.json            # -> medicine_catalog.bin
+    python catalog_store.py merged_medicine_data.csv -o other.bin
+
+Layout (little endian):
+
+    b"MEDICAT1" | header length (u64) | JSON header | per lazy field:
+    (count + 1) u64 offsets, then the UTF-8 blob of every value back to back
+
+The header carries the eager index columns (Drug Name, Active Ingredient)
+as plain lists, and, when written by catalog_etl.py, each record's normalized
+name and ingredient list. Long text columns stay in the mapped file and a value is
+only decoded when a record's field is read.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+import numpy as np
+
+from medicine_catalog import DATA_FILE, FIELDS
+
+CATALOG_BIN = "medicine_catalog.bin"
+MAGIC = b"MEDICAT1"
+EAGER_FIELDS = ["Drug Name", "Active Ingredient"]
+LAZY_FIELDS = [f for f in FIELDS if f not in EAGER_FIELDS]
+
+# Header spellings seen in registry CSV exports
+CSV_ALIASES = {"Company": "Company Name"}
+
+
+def read_source(path):
+    """Records from the cleaned JSON or the merged CSV export."""
+    if path.lower().endswith(".csv"):
+        from catalog_etl import clean, records
+
+        return records(clean(path)[0])
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_catalog(records, path=CATALOG_BIN, index=None):
+    """Write `records`; `index` ({"keys": [..], "ingredients": [[..]]} per record,
+    from catalog_etl) is stored so loading skips name normalization and ingredient parsing."""
+    records = [r for r in records if isinstance(r, dict) and r.get("Drug Name")]
+    count = len(records)
+    header = {
+        "count": count,
+        "eager": {field: [r.get(field) or "" for r in records] for field in EAGER_FIELDS},
+        "lazy": {},
+    }
+    if index is not None:
+        header["index"] = index
+
+    blobs = {}
+    for field in LAZY_FIELDS:
+        encoded = [(r.get(field) or "").encode("utf-8") for r in records]
+        offsets = np.zeros(count + 1, dtype="<u8")
+        np.cumsum([len(e) for e in encoded], out=offsets[1:])
+        blobs[field] = (offsets, b"".join(encoded))
+
+    # The header records section positions that depend on its own length,
+    # so lay out until the length stops changing
+    header_bytes = b""
+    while True:
+        position = len(MAGIC) + 8 + len(header_bytes)
+        for field in LAZY_FIELDS:
+            offsets, blob = blobs[field]
+            position += -position % 8
+            header["lazy"][field] = {"offsets": position, "blob": position + offsets.nbytes}
+            position += offsets.nbytes + len(blob)
+        laid_out = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        if len(laid_out) == len(header_bytes):
+            header_bytes = laid_out
+            break
+        header_bytes = laid_out
+
+    # Write next to the target and rename: running apps keep the old file mapped, and
+    # rewriting it in place would shift their LazyRecord text (or SIGBUS mid-truncate)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        for field in LAZY_FIELDS:
+            offsets, blob = blobs[field]
+            f.write(b"\0" * (header["lazy"][field]["offsets"] - f.tell()))
+            f.write(offsets.tobytes())
+            f.write(blob)
+    os.replace(tmp, path)
+    return count
+
+
+class CatalogFile:
+    """Read side of a catalog file: eager columns in memory, the rest mapped."""
+
+    def __init__(self, path=CATALOG_BIN):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a Medi-Bot catalog file")
+        (header_len,) = struct.unpack_from("<Q", self.mm, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self.mm[start:start + header_len].decode("utf-8"))
+        self.count = header["count"]
+        self.eager = header["eager"]
+        self.index = header.get("index")
+        self.offsets = {
+            field: (np.frombuffer(self.mm, dtype="<u8", count=self.count + 1, offset=pos["offsets"]),
+                    pos["blob"])
+            for field, pos in header["lazy"].items()
+        }
+
+    def value(self, field, row):
+        offsets, blob = self.offsets[field]
+        return self.mm[blob + int(offsets[row]):blob + int(offsets[row + 1])].decode("utf-8")
+
+    def records(self):
+        return [LazyRecord(self, row) for row in range(self.count)]
+
+
+class LazyRecord(Mapping):
+    """One catalog row; long text fields are decoded from the mapped file on access."""
+
+    __slots__ = ("_file", "_row")
+
+    def __init__(self, catalog_file, row):
+        self._file = catalog_file
+        self._row = row
+
+    def __getitem__(self, field):
+        if field in self._file.eager:
+            return self._file.eager[field][self._row]
+        if field in self._file.offsets:
+            return self._file.value(field, self._row)
+        raise KeyError(field)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return f"<LazyRecord {self['Drug Name']!r}>"
+
+
+def is_fresh(source=DATA_FILE, path=CATALOG_BIN):
+    """True when the catalog file exists and is at least as new as its source."""
+    return (os.path.exists(path)
+            and (not os.path.exists(source) or os.path.getmtime(path) >= os.path.getmtime(source)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the compact Medi-Bot catalog file.")
+    parser.add_argument("source", nargs="?", default=DATA_FILE, help="cleaned JSON or merged CSV")
+    parser.add_argument("-o", "--output", default=CATALOG_BIN)
+    args = parser.parse_args()
+
+    count = write_catalog(read_source(args.source), args.output)
+    print(f"Wrote {count} records to {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
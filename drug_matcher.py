@@ -0,0 +1,145 @@
+from medicine_catalog import get_catalog, normalize_name
+from metrics import METRICS
+
+# Characters easyocr commonly swaps for letters in handwritten drug names
+OCR_CONFUSIONS = str.maketrans({"0": "o", "1": "l", "4": "a", "5": "s", "8": "b", "|": "l"})
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if (prev_prev is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                cur[j] = min(cur[j], prev_prev[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, cur
+    return prev[-1]
+
+
+def _deletes(word, depth):
+    # Every variant of `word` with up to `depth` characters removed
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        nxt = set()
+        for w in frontier:
+            for i in range(len(w)):
+                nxt.add(w[:i] + w[i + 1:])
+        nxt -= found
+        found |= nxt
+        frontier = nxt
+    return found
+
+
+class DrugMatcher:
+    """Approximate drug-name lookup over the catalog (SymSpell deletion index).
+
+    Each catalog name is stored under all of its 1- and 2-character deletions.
+    A query generates its own deletions and only the names sharing one of them
+    are verified with a bounded edit distance, so a token touches a handful of
+    candidates rather than every row.
+    """
+
+    def __init__(self, names, max_distance=2, min_length=4):
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.index = {}
+        for name in names:
+            for variant in _deletes(name, max_distance):
+                self.index.setdefault(variant, []).append(name)
+
+    def updated(self, added=(), removed=()):
+        """New matcher with names added and removed; this one is left untouched."""
+        new = object.__new__(DrugMatcher)
+        new.max_distance = self.max_distance
+        new.min_length = self.min_length
+        new.index = dict(self.index)
+        for name in removed:
+            for variant in _deletes(name, self.max_distance):
+                names = [n for n in new.index.get(variant, ()) if n != name]
+                if names:
+                    new.index[variant] = names
+                else:
+                    new.index.pop(variant, None)
+        for name in added:
+            for variant in _deletes(name, self.max_distance):
+                new.index[variant] = new.index.get(variant, []) + [name]
+        return new
+
+    def allowed_distance(self, word):
+        # "napa" may be one edit off, "seclo" / "esoral" two; shorter tokens must be exact
+        if len(word) < self.min_length:
+            return 0
+        return 1 if len(word) <= 5 else self.max_distance
+
+    def match(self, token, limit=3):
+        """Ranked [(drug_name_key, confidence, distance)] for an OCR token."""
+        word = normalize_name(token)
+        if not word:
+            return []
+        max_distance = self.allowed_distance(word)
+        queries = {word, word.translate(OCR_CONFUSIONS)}
+
+        best = {}
+        for query in queries:
+            candidates = set()
+            for variant in _deletes(query, max_distance):
+                candidates.update(self.index.get(variant, ()))
+            # Digit/letter swaps are likely but not certain
+            penalty = 0 if query == word else 0.5 * sum(1 for c in word if c in "014589|")
+            for name in candidates:
+                distance = edit_distance(query, name, max_distance)
+                if distance > max_distance:
+                    continue
+                distance += penalty
+                if name not in best or distance < best[name]:
+                    best[name] = distance
+
+        ranked = sorted(best.items(), key=lambda kv: (kv[1], kv[0]))[:limit]
+        return [
+            (name, round(max(0.0, 1 - distance / max(len(name), len(word))), 3), distance)
+            for name, distance in ranked
+        ]
+
+    def best(self, token, min_confidence=0.8):
+        matches = self.match(token, limit=1)
+        if matches and matches[0][1] >= min_confidence:
+            return matches[0]
+        return None
+
+
+def get_matcher():
+    """Matcher over the current catalog snapshot (see catalog_reload.py)."""
+    from catalog_reload import get_live_catalog
+
+    return get_live_catalog().matcher
+
+
+def resolve(token, catalog=None, matcher=None, min_confidence=0.8):
+    """Catalog record for an OCR token: exact hit first, then the best fuzzy candidate."""
+    if catalog is None:
+        catalog = get_catalog()
+    if matcher is None:
+        matcher = get_matcher()
+    with METRICS.stage("match"):
+        item = catalog.get(token)
+        if item is not None:
+            return item, 1.0
+        hit = matcher.best(token, min_confidence)
+        if hit is None:
+            return None, 0.0
+        name, confidence, _ = hit
+        item = catalog.get(name)
+        # A matcher from a newer snapshot than `catalog` can name a drug it lacks
+        return (item, confidence) if item is not None else (None, 0.0)
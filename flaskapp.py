@@ -1,93 +1,35 @@
-import json
-import random
-import pandas as pd
 import streamlit as st
-from transformers import T5Tokenizer, T5ForConditionalGeneration
 from PIL import Image
-import easyocr
-import re
-import tempfile
-import os
+from catalog_reload import get_live_catalog
+from summarizer import DETAILED_VARIANTS, compose_summary, pick_variant
+from prescription import extract_medicines_from_image, find_alternates, get_item, regenerate_summary
+from ocr_service import get_ocr_service
+from warmup import get_summarizer, get_warmup, readiness_badge
+from metrics import METRICS, admin_panel, serve_metrics
+from interactions import check_prescription, get_interaction_index, show_findings
 
 # Streamlit config — must be first Streamlit call
 st.set_page_config(page_title="Medical Info Chatbot 💊", layout="centered")
 
-# Load tokenizer and model
-tokenizer = T5Tokenizer.from_pretrained("google/flan-t5-base")
-model = T5ForConditionalGeneration.from_pretrained("google/flan-t5-base")
-
-# Load data with caching
-@st.cache_data
-def load_data():
-    with open("medicine_data_cleaned.json", "r") as f:
-        data = json.load(f)
-    df = pd.DataFrame(data)
-    df = df.dropna(subset=["Drug Name"])
-    return df
-
-df = load_data()
-
-def extract_medicines_from_image(img):
-    reader = easyocr.Reader(['en'])
-
-    # Step 1: Save image to temp file
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp_file:
-        tmp_path = tmp_file.name
-        img.save(tmp_path)
-
-    # Step 2: Run OCR after file is saved and closed
-    result = reader.readtext(tmp_path, detail=0)
-
-    # Step 3: Remove the temp file after OCR is done
-    try:
-        os.remove(tmp_path)
-    except PermissionError:
-        print(f"⚠️ Could not delete temp file: {tmp_path}. It's still in use.")
-
-    # Step 4: Reconstruct lines like TAB XYZ, CAP XYZ, INJ XYZ, SYR XYZ, handling various formats
-    grouped = []
-    i = 0
-    while i < len(result):
-        # Check if current line starts with a valid medicine type (case-insensitive)
-        if result[i].strip().upper() in ['TAB', 'CAP', 'INJ', 'SYR']:
-            line = result[i].strip() + " "
-            i += 1
-            # Check if next line exists and is not a new medicine type
-            if i < len(result) and result[i].strip().upper() not in ['TAB', 'CAP', 'INJ', 'SYR']:
-                # Handle cases like "TAB - A", "TAB A", "TAB – A", or "TAB\nA"
-                line += result[i].strip()
-                i += 1
-            grouped.append(line.strip())
-        else:
-            # Handle standalone medicine names or other text
-            grouped.append(result[i].strip())
-            i += 1
-
-    # Step 5: Extract medicine names using regex
-    # Regex to match medicine type (TAB, CAP, INJ, SYR) followed by optional separator (-, –, space) and name
-    pattern = re.compile(r"^(TAB|CAP|INJ|SYR)\s*[-–]?\s*([A-Z\s]+)$", re.IGNORECASE)
-    extracted = []
-    for line in grouped:
-        match = pattern.search(line)
-        if match:
-            _, name = match.groups()
-            extracted.append(name.strip().title())
-        else:
-            # Handle cases where only medicine name appears (e.g., standalone "A")
-            name_pattern = re.compile(r"^[A-Z\s]+$", re.IGNORECASE)
-            if name_pattern.search(line):
-                extracted.append(line.strip().title())
-
-    return extracted
+# Start loading the model and OCR reader in the background (once per process), or
+# talk to the shared model server if one is configured
+warmup = get_warmup()
+summarizer = get_summarizer(warmup)
+serve_metrics()
 
+# The shared catalog and its lookup indexes, as of this rerun (hot-reloaded, see catalog_reload.py)
+catalog, matcher = get_live_catalog().snapshot()
+ocr = get_ocr_service()
 
 # 📸 Image Upload with "+"
 with st.expander("➕ Upload Prescription Image (Optional)", expanded=False):
     image_file = st.file_uploader("Upload an image", type=["jpg", "jpeg", "png"])
     if image_file:
-        img = Image.open(image_file)
+        with METRICS.stage("decode"):
+            img = Image.open(image_file)
+            img.load()
         st.image(img, caption="Uploaded Prescription", use_column_width=True)
-        extracted_meds = extract_medicines_from_image(img)
+        extracted_meds = extract_medicines_from_image(img, ocr, catalog, matcher)
         if extracted_meds:
             st.success(f"🧠 Extracted Medicines: {', '.join(extracted_meds)}")
             st.session_state["ocr_meds"] = ", ".join(extracted_meds)
@@ -96,92 +38,13 @@ with st.expander("➕ Upload Prescription Image (Optional)", expanded=False):
 
 # UI Title and description
 st.title("💊 Medical Info Chatbot")
+readiness_badge(warmup)
 st.markdown("Get a quick summary and structured details of medicine(s). Enter one or more names separated by commas.")
 
 # Use OCR meds if available
 default_text = st.session_state.get("ocr_meds", "")
 user_input = st.text_input("Medicine Name(s)", default_text)
 
-# Prompt builder
-def build_prompt(item):
-    variants = [
-        (
-            f"Write a medical summary for the following drug in one clear paragraph. "
-            f"Be sure to include what it's used for and if it's safe during pregnancy:\n"
-            f"- Drug Name: {item['Drug Name']}\n"
-            f"- Company Name: {item['Company Name']}\n"
-            f"- Active Ingredient: {item['Active Ingredient']}\n"
-            f"- Indication: {item['Indication']}\n"
-            f"- Dosage and Administration: {item['Dosage and Administration']}\n"
-            f"- Side Effects: {item['Side Effects']}\n"
-            f"- Use in pregnancy: {item['Use in pregnancy']}\n"
-        ),
-        (
-            f"Summarize the medicine below in a paragraph. Be sure to mention its use and pregnancy safety:\n"
-            f"Drug: {item['Drug Name']} | Company: {item['Company Name']} | Ingredient: {item['Active Ingredient']} | "
-            f"Indication: {item['Indication']} | Dosage: {item['Dosage and Administration']} | "
-            f"Side Effects: {item['Side Effects']} | Pregnancy: {item['Use in pregnancy']}."
-        ),
-        (
-            f"Create a brief but complete medical description of this drug, and ensure that indication and pregnancy use are included:\n"
-            f"{item['Drug Name']} by {item['Company Name']} contains {item['Active Ingredient']}. "
-            f"It is used for {item['Indication']}. "
-            f"Recommended dosage is {item['Dosage and Administration']}. "
-            f"Possible side effects include {item['Side Effects']}. "
-            f"Pregnancy safety: {item['Use in pregnancy']}."
-        ),
-    ]
-    return random.choice(variants)
-
-def generate_summary_text(prompt):
-    input_ids = tokenizer(prompt, return_tensors="pt", truncation=True).input_ids
-    output_ids = model.generate(
-        input_ids,
-        max_length=320,
-        num_beams=5,
-        no_repeat_ngram_size=3,
-        repetition_penalty=1.2,
-        early_stopping=True
-    )
-    return tokenizer.decode(output_ids[0], skip_special_tokens=True)
-
-def generate_summary_until_different(item, old_summary, max_attempts=5):
-    for _ in range(max_attempts):
-        prompt = build_prompt(item)
-        new_summary = generate_summary_text(prompt)
-        if (
-            new_summary.strip() != old_summary.strip()
-            and "pregnancy" in new_summary.lower()
-            and "indication" in new_summary.lower()
-        ):
-            return new_summary
-
-    final_summary = new_summary.strip()
-    if "indication" not in final_summary.lower():
-        final_summary += f" This drug is indicated for {item['Indication'].strip()}."
-    if "pregnancy" not in final_summary.lower():
-        final_summary += f" Use during pregnancy: {item['Use in pregnancy'].strip()}."
-    return final_summary
-
-def get_item(drug_name):
-    row = df[df["Drug Name"].str.lower() == drug_name.lower()]
-    if row.empty:
-        return None, f"No information found for '{drug_name}'."
-    return row.iloc[0], None
-
-def find_alternates(active_ingredient, current_drug_name, df, max_alternates=2):
-    filtered = df[
-        (df["Active Ingredient"].str.lower() == active_ingredient.lower()) &
-        (df["Drug Name"].str.lower() != current_drug_name.lower())
-    ]
-    alternates = filtered["Drug Name"].tolist()[:max_alternates]
-    
-    # If no alternates found, return a special message
-    if not alternates:
-        return ["🙏 No alternates available in my dataset"]
-    return alternates
-
-
 def generate_bullet_list(item, alternates=None):
     alt_str = ""
     if alternates:
@@ -209,14 +72,31 @@ if user_input:
     drug_names = [name.strip() for name in user_input.split(",") if name.strip()]
     found = False
 
+    # Duplicate therapy, interactions and pregnancy conflicts across the whole list
+    checked = [item for item in (catalog.get(drug) for drug in drug_names) if item is not None]
+    if len(checked) > 1:
+        st.subheader("🩺 Prescription check")
+        show_findings(check_prescription(checked, get_interaction_index(), catalog))
+
+    # Generate every missing first-time summary in one batched pass
+    missing = [drug for drug in drug_names
+               if f"summary_{drug.lower()}" not in st.session_state and catalog.get(drug) is not None]
+    if missing:
+        items = [catalog.get(drug) for drug in missing]
+        variants = [pick_variant(DETAILED_VARIANTS, item) for item in items]
+        with st.spinner("Generating summaries..."):
+            for i, summary in summarizer.summarize_many(items, variants):
+                st.session_state[f"summary_{missing[i].lower()}"] = summary
+                st.session_state[f"prev_summary_{missing[i].lower()}"] = summary
+
     for drug in drug_names:
-        item, error = get_item(drug)
+        item, error = get_item(drug, catalog)
         if error:
             st.warning(error)
             continue
 
         # Find alternate medicines by active ingredient
-        alternates = find_alternates(item['Active Ingredient'], item['Drug Name'], df)
+        alternates = find_alternates(item['Drug Name'], catalog)
 
         key = f"summary_{drug.lower()}"
         prev_key = f"prev_summary_{drug.lower()}"
@@ -225,32 +105,41 @@ if user_input:
             st.session_state[prev_key] = ""
 
         if st.button(f"🔁 Regenerate summary for {item['Drug Name']}", key=f"regen_{key}"):
-            prompt = build_prompt(item)
-            summary = generate_summary_until_different(item, st.session_state[prev_key])
-            st.session_state[key] = summary
-            st.session_state[prev_key] = summary
-
+            try:
+                with st.spinner("Rewording the summary..."):
+                    summary = regenerate_summary(item, st.session_state[prev_key], summarizer)
+            except Exception as e:
+                summary = None
+                st.warning(f"⚠️ Could not regenerate the summary: {e}")
+            else:
+                if summary is None:
+                    st.info("No new wording kept every fact from the record, so the summary is unchanged.")
+            if summary is not None:
+                st.session_state[key] = summary
+                st.session_state[prev_key] = summary
+
+        variant = pick_variant(DETAILED_VARIANTS, item)
         if key not in st.session_state:
-            prompt = build_prompt(item)
-            summary = generate_summary_text(prompt)
+            summary = summarizer.summarize(item, variant)
             st.session_state[key] = summary
             st.session_state[prev_key] = summary
 
         summary = st.session_state[key]
-        bullet_list = generate_bullet_list(item, alternates)
-
-        if len(summary.split()) < 30:
+        # A template is as complete as the record it is composed from
+        if len(summary.split()) < 30 and summary != compose_summary(item, variant):
             st.warning(f"⚠️ Summary for '{item['Drug Name']}' may be incomplete. Try regenerating or editing input.")
 
-        st.markdown(f"""
-        <div style="background-color: #ffffff; padding: 20px; margin-top: 20px;
-                    border-left: 6px solid #1a73e8; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.05);">
-           <h3 style="color: #1a73e8;">🧾 Summary for: <span style="color: #34a853;">{item['Drug Name']}</span></h3>
-           <p style="font-size: 16px; line-height: 1.6;">{summary}</p>
-           <hr>
-           <div style="font-size: 15px; line-height: 1.8;">{bullet_list}</div>
-        </div>
-        """, unsafe_allow_html=True)
+        with METRICS.stage("render"):
+            bullet_list = generate_bullet_list(item, alternates)
+            st.markdown(f"""
+            <div style="background-color: #ffffff; padding: 20px; margin-top: 20px;
+                        border-left: 6px solid #1a73e8; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.05);">
+               <h3 style="color: #1a73e8;">🧾 Summary for: <span style="color: #34a853;">{item['Drug Name']}</span></h3>
+               <p style="font-size: 16px; line-height: 1.6;">{summary}</p>
+               <hr>
+               <div style="font-size: 15px; line-height: 1.8;">{bullet_list}</div>
+            </div>
+            """, unsafe_allow_html=True)
 
         found = True
 
@@ -258,6 +147,8 @@ if user_input:
         st.info("No valid medicine names found. Please check your input.")
 
 
+admin_panel()
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -0,0 +1,141 @@
+import numpy as np
+from PIL import Image, ImageOps
+
+# Line height in pixels that easyocr's detector reads reliably; taller text is shrunk towards it
+TEXT_HEIGHT = 32
+
+
+def otsu_threshold(gray):
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    mean_bg = np.cumsum(hist * levels)
+    mean_all = mean_bg[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mean_all * weight_bg / total - mean_bg) ** 2 / (weight_bg * weight_fg)
+    return int(np.nanargmax(between))
+
+
+def ink_mask(gray):
+    """Boolean mask of dark (ink) pixels on a light page."""
+    return gray < otsu_threshold(gray)
+
+
+class Preprocessor:
+    """Shrinks and cleans a prescription photo before it reaches easyocr.
+
+    OCR time on CPU grows with pixel count, and phone photos are far larger
+    than the text needs. Steps run in this order, each can be switched off:
+
+    - downscale so the text lines are about `text_height` pixels tall,
+      measured on the image itself, so a tight crop of small print keeps
+      its resolution while a whole-page phone photo shrinks
+    - grayscale
+    - contrast normalization (autocontrast with a small clip)
+    - deskew by maximizing the row-profile variance over small angles
+    - crop to the bounding box of text-dense rows and columns
+    """
+
+    def __init__(self, text_height=TEXT_HEIGHT, grayscale=True, normalize=True, deskew=True, crop_text=True,
+                 max_skew=5.0, skew_step=0.5, min_long_side=1000):
+        self.text_height = text_height
+        # Never shrink below this, in case merged handwritten lines inflate the estimate
+        self.min_long_side = min_long_side
+        self.grayscale = grayscale
+        self.normalize = normalize
+        self.deskew = deskew
+        self.crop_text = crop_text
+        self.max_skew = max_skew
+        self.skew_step = skew_step
+
+    def __call__(self, image):
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        image = image.convert("RGB")
+        info = {"original_size": image.size, "scale": 1.0, "angle": 0.0, "crop": None, "line_height": None}
+
+        if self.text_height:
+            info["line_height"] = self._line_height(image)
+            image, info["scale"] = self._downscale(image, info["line_height"])
+        if self.grayscale:
+            image = image.convert("L")
+        if self.normalize:
+            image = ImageOps.autocontrast(image, cutoff=1)
+        if self.deskew:
+            info["angle"] = self._skew_angle(image)
+            if info["angle"]:
+                fill = 255 if image.mode == "L" else (255, 255, 255)
+                image = image.rotate(info["angle"], resample=Image.BICUBIC, expand=True, fillcolor=fill)
+        if self.crop_text:
+            box = self._text_box(image)
+            if box is not None:
+                image = image.crop(box)
+                info["crop"] = box
+
+        info["size"] = image.size
+        return np.array(image), info
+
+    def _line_height(self, image, probe=1600):
+        """Median height in pixels of the ink rows' runs, or None if no text lines stand out."""
+        thumb = image.convert("L")
+        thumb.thumbnail((probe, probe))
+        ratio = max(image.size) / max(thumb.size)
+        mask = ink_mask(np.array(ImageOps.autocontrast(thumb, cutoff=1)))
+        rows = mask.mean(axis=1) > 0.01
+        # Start and end of every run of consecutive inked rows
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], rows.astype(np.int8), [0]))))
+        heights = edges[1::2] - edges[::2]
+        heights = heights[heights >= 3]
+        if heights.size == 0:
+            return None
+        return float(np.median(heights)) * ratio
+
+    def _downscale(self, image, line_height):
+        long_side = max(image.size)
+        if line_height is None or line_height <= self.text_height:
+            return image, 1.0
+        target = max(self.min_long_side, int(long_side * self.text_height / line_height))
+        if long_side <= target:
+            return image, 1.0
+        scale = target / long_side
+        size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        # Cheap integer box-reduce first, then a high-quality resize of the small image
+        factor = int(long_side // target)
+        if factor >= 2:
+            image = image.reduce(factor)
+        return image.resize(size, Image.LANCZOS), scale
+
+    def _skew_angle(self, image):
+        # Search on a small thumbnail: straight text lines give the peakiest row profile
+        thumb = image.convert("L")
+        thumb.thumbnail((600, 600))
+        best_angle, best_score = 0.0, None
+        for angle in np.arange(-self.max_skew, self.max_skew + 1e-9, self.skew_step):
+            rotated = np.array(thumb.rotate(float(angle), resample=Image.NEAREST, fillcolor=255))
+            score = ink_mask(rotated).sum(axis=1).astype(np.float64).var()
+            if best_score is None or score > best_score:
+                best_angle, best_score = float(angle), score
+        return best_angle
+
+    def _text_box(self, image, min_density=0.02, margin=0.02):
+        mask = ink_mask(np.array(image.convert("L")))
+        rows = np.flatnonzero(mask.mean(axis=1) > min_density)
+        cols = np.flatnonzero(mask.mean(axis=0) > min_density)
+        if rows.size == 0 or cols.size == 0:
+            return None
+        pad_y = int(image.height * margin)
+        pad_x = int(image.width * margin)
+        box = (
+            max(0, int(cols[0]) - pad_x),
+            max(0, int(rows[0]) - pad_y),
+            min(image.width, int(cols[-1]) + 1 + pad_x),
+            min(image.height, int(rows[-1]) + 1 + pad_y),
+        )
+        # Not worth a crop if it keeps nearly the whole page
+        if (box[2] - box[0]) * (box[3] - box[1]) > 0.95 * image.width * image.height:
+            return None
+        return box
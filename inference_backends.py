@@ -0,0 +1,59 @@
+"""Selectable flan-t5 inference backends for CPU serving.
+
+Pick one with the MEDIBOT_BACKEND environment variable:
+
+    torch       PyTorch fp32 (default, what the apps always used)
+    torch-int8  PyTorch with dynamic int8 quantization of every nn.Linear
+    onnx        ONNX encoder / decoder / decoder-with-past under ONNX Runtime
+
+Every backend returns a model exposing the usual transformers .generate(),
+so Summarizer does not care which one runs. The tokenizer is the same for all
+of them and comes from summarizer.load_tokenizer (summarizer.load_model
+returns both).
+"""
+import os
+
+BACKEND = os.environ.get("MEDIBOT_BACKEND", "torch")
+ONNX_DIR = os.environ.get("MEDIBOT_ONNX_DIR", "onnx")
+
+
+def _load_torch(model_name):
+    from transformers import T5ForConditionalGeneration
+
+    model = T5ForConditionalGeneration.from_pretrained(model_name)
+    model.eval()
+    return model
+
+
+def _load_torch_int8(model_name):
+    import torch
+
+    model = _load_torch(model_name)
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _load_onnx(model_name):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    export_dir = os.path.join(ONNX_DIR, model_name.replace("/", "--"))
+    if os.path.isdir(export_dir):
+        return ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+    # First run: export encoder + decoder (+ KV-cache decoder) once and keep it on disk
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+    model.save_pretrained(export_dir)
+    return model
+
+
+BACKENDS = {
+    "torch": _load_torch,
+    "torch-int8": _load_torch_int8,
+    "onnx": _load_onnx,
+}
+
+
+def load(model_name, backend=None):
+    """The flan-t5 model for `backend` (default MEDIBOT_BACKEND); the tokenizer is loaded separately."""
+    backend = backend or BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MEDIBOT_BACKEND '{backend}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](model_name)
@@ -0,0 +1,264 @@
+"""Prescription-level checks: duplicate therapy, known interactions, pregnancy conflicts.
+
+    from interactions import check_prescription, get_interaction_index
+    findings = check_prescription(found_meds, get_interaction_index(), catalog)
+
+The rules live in drug_interactions.json (MEDIBOT_INTERACTIONS):
+
+    classes       therapeutic classes; two drugs in one class are a duplicate therapy
+    groups        ingredient sets that only matter for interactions ("polyvalent cation")
+    supplements   vitamins and minerals; products sharing only these overlap, they do not
+                  double a drug ("vitamin d3" is covered by "vitamin")
+    interactions  {"a": .., "b": [..], "severity": "major" | "moderate", "effect": ".."},
+                  where "@name" stands for every member of a class or group
+
+At load time the rules are expanded into a sparse adjacency map, ingredient ->
+{ingredient: (severity, effect)}, so checking an N-drug prescription is
+N * (N - 1) / 2 pairs of set intersections and dict lookups. Catalog
+ingredients ("olmesartan medoxomil") are mapped to the names the rules use
+once per distinct ingredient string.
+
+The shipped table is a starter set of well-documented pairs and is not
+exhaustive. Findings support a pharmacist's review and do not replace it.
+
+The examples of pregnancy_level and check_prescription are catalog strings;
+check them with python -m doctest interactions.py
+"""
+import json
+import os
+import re
+from itertools import combinations
+
+import streamlit as st
+
+from medicine_catalog import normalize_name, parse_ingredients
+from metrics import METRICS
+
+INTERACTIONS_FILE = os.environ.get("MEDIBOT_INTERACTIONS", "drug_interactions.json")
+SEVERITY_ORDER = {"major": 0, "moderate": 1, "minor": 2}
+
+# Free-text "Use in pregnancy" values, most restrictive first
+PREGNANCY_LEVELS = [
+    ("contraindicated", re.compile(r"(?<!not )contraindicated|category\s*x\b", re.IGNORECASE)),
+    # Negated "safe" first, or the safe pattern below would claim "Not safe in pregnancy"
+    ("avoid", re.compile(r"\bavoid|not recommended|should not be used|do not use|category\s*d\b"
+                         r"|not safe|\bunsafe|safety not (?:well )?established|not intended for use",
+                         re.IGNORECASE)),
+    ("caution", re.compile(r"caution|clearly needed|benefit|consult|only if|if necessary|category\s*c\b",
+                           re.IGNORECASE)),
+    ("safe", re.compile(r"\bsafe|category\s*[ab]\b|recommended", re.IGNORECASE)),
+]
+# Indications that mean the patient is (or is planning to be) pregnant
+_FOR_PREGNANCY = re.compile(r"pregnan|prenatal|antenatal|neural tube", re.IGNORECASE)
+
+
+def pregnancy_level(text):
+    """contraindicated, avoid, caution, safe or unknown for a "Use in pregnancy" value.
+
+    >>> pregnancy_level("Contraindicated; discontinue if pregnancy is confirmed")
+    'contraindicated'
+    >>> pregnancy_level("Not contraindicated; use if clearly needed")
+    'caution'
+    >>> pregnancy_level("Not safe in pregnancy")
+    'avoid'
+    >>> pregnancy_level("Safety not well established; use only if clearly needed")
+    'avoid'
+    >>> pregnancy_level("Not recommended unless essential")
+    'avoid'
+    >>> pregnancy_level("Category D; should be avoided during pregnancy and lactation")
+    'avoid'
+    >>> pregnancy_level("Use only if clearly needed")
+    'caution'
+    >>> pregnancy_level("Generally safe (Category B)")
+    'safe'
+    >>> pregnancy_level("Recommended for use during pregnancy and lactation")
+    'safe'
+    """
+    for level, pattern in PREGNANCY_LEVELS:
+        if pattern.search(text or ""):
+            return level
+    return "unknown"
+
+
+class InteractionIndex:
+    def __init__(self, table):
+        self.classes = {name: tuple(normalize_name(m) for m in members)
+                        for name, members in table.get("classes", {}).items()}
+        groups = {name: tuple(normalize_name(m) for m in members)
+                  for name, members in table.get("groups", {}).items()}
+        sets = dict(groups, **self.classes)
+
+        # ingredient -> {ingredient: (severity, effect)}
+        self.pairs = {}
+        for rule in table.get("interactions", []):
+            left = self._expand([rule["a"]], sets)
+            right = self._expand(rule["b"] if isinstance(rule["b"], list) else [rule["b"]], sets)
+            finding = (rule["severity"], rule["effect"])
+            for a in left:
+                for b in right:
+                    if a != b:
+                        self._add(a, b, finding)
+                        self._add(b, a, finding)
+
+        self.supplements = tuple(normalize_name(s) for s in table.get("supplements", ()))
+        self.class_of = {}
+        for name, members in self.classes.items():
+            for member in members:
+                self.class_of.setdefault(member, set()).add(name)
+        # Longest first, so "ethinyl estradiol" is tried before a shorter name it starts with
+        self.names = sorted({m for members in sets.values() for m in members} | set(self.pairs),
+                            key=len, reverse=True)
+        self._canonical = {}
+
+    @staticmethod
+    def _expand(refs, sets):
+        names = set()
+        for ref in refs:
+            if ref.startswith("@"):
+                names.update(sets[ref[1:]])
+            else:
+                names.add(normalize_name(ref))
+        return names
+
+    def _add(self, a, b, finding):
+        current = self.pairs.setdefault(a, {}).get(b)
+        # Keep the most severe rule when several cover the same pair
+        if current is None or SEVERITY_ORDER[finding[0]] < SEVERITY_ORDER[current[0]]:
+            self.pairs[a][b] = finding
+
+    @classmethod
+    def from_file(cls, path=INTERACTIONS_FILE):
+        if not os.path.exists(path):
+            return cls({})
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    def canonical(self, ingredient):
+        """Rule names covering a catalog ingredient ("levofloxacin hemihydrate" -> {"levofloxacin"})."""
+        names = self._canonical.get(ingredient)
+        if names is None:
+            names = frozenset(n for n in self.names if ingredient == n or ingredient.startswith(n + " "))
+            self._canonical[ingredient] = names
+        return names
+
+    def is_supplement(self, ingredient):
+        return any(ingredient == s or ingredient.startswith(s + " ") for s in self.supplements)
+
+
+def _ingredients(item, catalog):
+    if catalog is not None:
+        known = catalog.ingredients_of.get(normalize_name(item["Drug Name"]))
+        if known is not None:
+            return known
+    return parse_ingredients(item["Active Ingredient"])
+
+
+def check_prescription(items, index, catalog=None):
+    """Findings for a list of catalog records, most severe first.
+
+    Each finding is {"kind": "duplicate" | "interaction" | "pregnancy",
+    "severity": "major" | "moderate" | "minor", "drugs": [names], "message": ".."}.
+
+    >>> index = InteractionIndex.from_file()
+    >>> def check(*drugs):
+    ...     items = [{"Drug Name": name, "Active Ingredient": text, "Indication": "", "Use in pregnancy": ""}
+    ...              for name, text in drugs]
+    ...     return [(f["kind"], f["severity"], f["message"]) for f in check_prescription(items, index)]
+    >>> check(("Ciprocin", "Ciprofloxacin 0.3%"), ("Gastocid Plus", "Al(OH)3 + Mg(OH)2 + Simethicone"))
+    [('interaction', 'moderate', 'Ciprofloxacin + Aluminium Hydroxide: Cations bind the antibiotic and cut its absorption; separate the doses by 2-4 hours.')]
+    >>> check(("Napa Syrup", "Paracetamol 120 mg/5 ml"), ("Ace Syrup", "Paracetamol 120 mg/5 ml"))
+    [('duplicate', 'major', 'Both contain paracetamol; taking both doubles the dose.')]
+    >>> check(("Univit-Plus", "comprehensive mix of multivitamins and multiminerals, "
+    ...                       "including Vitamins A, C, D, E, B-complex, Iron, and Zinc."),
+    ...       ("Supravit-M", "Retinyl Palmitate, Cholecalciferol, B-complex, Folic Acid, Ferrous Fumarate, Zinc Sulfate."))
+    [('duplicate', 'minor', 'Both contain vitamin b-complex, zinc; check the combined daily amount.')]
+    """
+    with METRICS.stage("check"):
+        findings = []
+        drugs = []
+        for item in items:
+            ingredients = _ingredients(item, catalog)
+            names = frozenset().union(*(index.canonical(i) for i in ingredients))
+            classes = set().union(*(index.class_of.get(n, ()) for n in names))
+            drugs.append((item, ingredients, names, classes))
+
+        for (a, ing_a, names_a, classes_a), (b, ing_b, names_b, classes_b) in combinations(drugs, 2):
+            pair = [a["Drug Name"], b["Drug Name"]]
+            # Same ingredient, also across salt spellings ("olmesartan medoxomil" / "olmesartan")
+            shared = (ing_a & ing_b) or (names_a & names_b)
+            if shared and all(index.is_supplement(i) for i in shared):
+                findings.append({
+                    "kind": "duplicate", "severity": "minor", "drugs": pair,
+                    "message": f"Both contain {', '.join(sorted(shared))}; check the combined daily amount.",
+                })
+            elif shared:
+                findings.append({
+                    "kind": "duplicate", "severity": "major", "drugs": pair,
+                    "message": f"Both contain {', '.join(sorted(shared))}; taking both doubles the dose.",
+                })
+            elif classes_a & classes_b:
+                findings.append({
+                    "kind": "duplicate", "severity": "moderate", "drugs": pair,
+                    "message": f"Both are {' and '.join(sorted(classes_a & classes_b))}s; usually one is enough.",
+                })
+            seen = set()
+            # Sorted, so the reported pair of a group rule does not change between runs
+            for x in sorted(names_a):
+                row = index.pairs.get(x)
+                if not row:
+                    continue
+                for y in sorted(names_b):
+                    hit = row.get(y)
+                    if hit is not None and hit not in seen:
+                        seen.add(hit)
+                        severity, effect = hit
+                        findings.append({"kind": "interaction", "severity": severity, "drugs": pair,
+                                         "message": f"{x.title()} + {y.title()}: {effect}."})
+
+        findings += pregnancy_findings(items)
+        findings.sort(key=lambda f: SEVERITY_ORDER.get(f["severity"], 9))
+        return findings
+
+
+def pregnancy_findings(items):
+    levels = [(item, pregnancy_level(item["Use in pregnancy"])) for item in items]
+    unsafe = [(item, level) for item, level in levels if level in ("contraindicated", "avoid")]
+    if not unsafe:
+        return []
+    for_pregnancy = [item for item in items if _FOR_PREGNANCY.search(item["Indication"] or "")]
+    if for_pregnancy:
+        # The prescription itself says the patient is pregnant
+        given = [item["Drug Name"] for item in for_pregnancy]
+        conflicts = "; ".join(
+            f"{item['Drug Name']} is {'contraindicated' if level == 'contraindicated' else 'to be avoided'}"
+            for item, level in unsafe
+        )
+        return [{
+            "kind": "pregnancy", "severity": "major", "drugs": given + [item["Drug Name"] for item, _ in unsafe],
+            "message": f"{', '.join(given)} is given in pregnancy, but {conflicts} in pregnancy.",
+        }]
+    # Without a sign of pregnancy in the prescription these are reminders, not conflicts
+    return [{
+        "kind": "pregnancy", "severity": "moderate" if level == "contraindicated" else "minor",
+        "drugs": [item["Drug Name"]],
+        "message": f"{item['Drug Name']}: {item['Use in pregnancy']}. Check whether the patient is pregnant.",
+    } for item, level in unsafe]
+
+
+@st.cache_resource(show_spinner=False)
+def get_interaction_index(path=INTERACTIONS_FILE):
+    return InteractionIndex.from_file(path)
+
+
+ICONS = {"duplicate": "🔁", "interaction": "⚠️", "pregnancy": "🤰"}
+
+
+def show_findings(findings):
+    """Prescription check results: major as errors, moderate as warnings, minor as notes."""
+    if not findings:
+        st.success("✅ No duplicate therapy, known interaction or pregnancy conflict found.")
+        return
+    show = {"major": st.error, "moderate": st.warning}
+    for f in findings:
+        show.get(f["severity"], st.info)(f"{ICONS[f['kind']]} **{' + '.join(f['drugs'])}**: {f['message']}")
+    st.caption("Automated check against a starter interaction table; confirm with a pharmacist.")
@@ -0,0 +1,285 @@
+import json
+import re
+from collections.abc import Mapping
+
+DATA_FILE = "medicine_data_cleaned.json"
+
+FIELDS = [
+    "Drug Name",
+    "Company Name",
+    "Active Ingredient",
+    "Indication",
+    "Dosage and Administration",
+    "Side Effects",
+    "Use in pregnancy",
+]
+
+# Bump when normalize_name or parse_ingredients change: binary catalogs store their
+# output and are only trusted when written by the same version
+PARSER_VERSION = 2
+
+_SPACES = re.compile(r"\s+")
+# Zero-width spaces and joiners and the BOM, pasted in from web sources
+_INVISIBLE = re.compile("[\u200b-\u200d\u2060\ufeff]")
+_EDGE_PUNCTUATION = " .,;:"
+# "+", "&", " and ", ";", "," and "including" separate ingredients of a combination product
+_INGREDIENT_SPLIT = re.compile(r"\s*(?:\+|&|;|,|\band\b|\bincluding\b)\s*", re.IGNORECASE)
+# Strengths such as "0.5 mg", "250 mcg/puff", "0.3%", "25 mg / 100 mg", "3.35 gm/5 ml"
+_STRENGTH = re.compile(r"(?<![a-z0-9.])\d+(?:\.\d+)?\s*(?:mg|mcg|µg|gm|g|ml|iu|%)?"
+                       r"(?:\s*/\s*(?:\d+(?:\.\d+)?\s*)?[a-z%]*)*|\bw/[wv]\b",
+                       re.IGNORECASE)
+# Antacid formulas, named before _PARENS would cut "Al(OH)3" down to "al"
+_FORMULAS = {
+    "al(oh)3": "aluminium hydroxide",
+    "mg(oh)2": "magnesium hydroxide",
+    "caco3": "calcium carbonate",
+    "mgo": "magnesium oxide",
+    "nahco3": "sodium bicarbonate",
+}
+_FORMULA = re.compile("|".join(rf"(?<![a-z0-9]){re.escape(f)}(?![a-z0-9])" for f in _FORMULAS), re.IGNORECASE)
+_PARENS = re.compile(r"\([^)]*\)")
+# Bare vitamin letters from lists like "Vitamin A, D3, E, B-complex": "d3" -> "vitamin d3"
+_VITAMIN = re.compile(r"^(?:vitamins? )?([a-k]\d{0,2}(?:[- ]complex|-[a-k]?\d{1,2})?)$")
+# Descriptions standing in for a formulation ("essential vitamins and minerals for seniors")
+_GENERIC = {"multivitamin": re.compile(r"vitamins\b|multi-?vitamin"),
+            "multimineral": re.compile(r"minerals\b|multi-?mineral|micronutrients")}
+# Trailing salt and hydrate words that do not change the active moiety
+# ("Pantoprazole Sodium" -> "pantoprazole", while "Sodium Chloride" is kept)
+_SALTS = {
+    "hydrochloride", "hcl", "hydrobromide", "fumarate", "maleate", "mesylate", "besylate",
+    "tartrate", "succinate", "sulphate", "sulfate", "xinafoate", "trihydrate", "monohydrate",
+    "dihydrate", "sodium", "potassium", "calcium", "magnesium",
+}
+
+
+def normalize_name(name):
+    # "  Napa  Extra. " -> "napa extra"
+    if not isinstance(name, str):
+        return ""
+    return _SPACES.sub(" ", _INVISIBLE.sub("", name)).strip(_EDGE_PUNCTUATION).lower()
+
+
+def _ingredient(part):
+    words = normalize_name(_STRENGTH.sub(" ", part)).split(" ")
+    while len(words) > 1 and words[-1] in _SALTS:
+        words.pop()
+    name = " ".join(words).strip(_EDGE_PUNCTUATION)
+    vitamin = _VITAMIN.match(name)
+    if vitamin:
+        return "vitamin " + vitamin.group(1).replace(" ", "-")
+    for generic, pattern in _GENERIC.items():
+        if pattern.search(name):
+            return generic
+    return name
+
+
+def parse_ingredients(text):
+    """Normalized ingredient set of an Active Ingredient value.
+
+    >>> sorted(parse_ingredients("Salmeterol Xinafoate 25 mcg + Fluticasone Propionate"))
+    ['fluticasone propionate', 'salmeterol']
+    >>> sorted(parse_ingredients("Al(OH)3 + Mg(OH)2 + Simethicone"))
+    ['aluminium hydroxide', 'magnesium hydroxide', 'simethicone']
+    >>> sorted(parse_ingredients("Vitamin C, Vitamin D3, and Folic Acid\u200b"))
+    ['folic acid', 'vitamin c', 'vitamin d3']
+    >>> sorted(parse_ingredients("Ferrous Fumarate, Zinc Sulfate, Copper Sulfate, Magnesium Oxide, Potassium Iodide."))
+    ['copper', 'ferrous', 'magnesium oxide', 'potassium iodide', 'zinc']
+    >>> sorted(parse_ingredients("Multivitamins and multiminerals including Iron, Folic Acid, Vitamin A, D, E, B-complex, Zinc"))
+    ['folic acid', 'iron', 'multimineral', 'multivitamin', 'vitamin a', 'vitamin b-complex', 'vitamin d', 'vitamin e', 'zinc']
+    >>> sorted(parse_ingredients("Lactulose 3.35 gm/5 ml")), sorted(parse_ingredients("Luliconazole 1% w/w"))
+    (['lactulose'], ['luliconazole'])
+    """
+    if not isinstance(text, str):
+        return frozenset()
+    text = _FORMULA.sub(lambda m: _FORMULAS[m.group(0).lower()], text)
+    ingredients = set()
+    for part in _INGREDIENT_SPLIT.split(_PARENS.sub(" ", text)):
+        name = _ingredient(part)
+        if name:
+            ingredients.add(name)
+    return frozenset(ingredients)
+
+
+class MedicineCatalog:
+    """In-memory medicine records with a normalized drug-name index.
+
+    Built once per process; lookups are a single dict access instead of a
+    lowercase-and-compare pass over the whole ``Drug Name`` column.
+    """
+
+    def __init__(self, records, normalized=False, index=None):
+        # index: per-record normalized names and ingredient lists precomputed by
+        # catalog_etl.py (normalized records only)
+        if index and index.get("parser") != PARSER_VERSION:
+            # Written by an older parser; recompute rather than trust stale keys
+            index = None
+        keys = index["keys"] if index else None
+        known = {}
+        if index:
+            for key, ingredients in zip(keys, index["ingredients"]):
+                known.setdefault(key, frozenset(ingredients))
+
+        self.records = []
+        self.by_name = {}
+        for row, raw in enumerate(records):
+            if normalized:
+                # Already complete rows, e.g. LazyRecords from catalog_store
+                item = raw
+            elif not isinstance(raw, dict) or not raw.get("Drug Name"):
+                continue
+            else:
+                item = {field: (raw.get(field) or "") for field in FIELDS}
+            self.records.append(item)
+            # First record wins, same as df[...].iloc[0]
+            key = keys[row] if keys else normalize_name(item["Drug Name"])
+            self.by_name.setdefault(key, item)
+
+        # Ingredient indexes over the distinct drugs:
+        # ingredient -> drug keys, drug key -> ingredient set, ingredient set -> drug keys
+        self.by_ingredient = {}
+        self.ingredients_of = {}
+        self.by_composition = {}
+        self._order = {}
+        for key, item in self.by_name.items():
+            self._order[key] = len(self._order)
+            ingredients = known[key] if index else parse_ingredients(item["Active Ingredient"])
+            self.ingredients_of[key] = ingredients
+            if ingredients:
+                self.by_composition.setdefault(ingredients, []).append(key)
+            for ingredient in ingredients:
+                self.by_ingredient.setdefault(ingredient, []).append(key)
+
+    def updated(self, upserts=(), deletes=()):
+        """New catalog with `upserts` added or replaced and `deletes` removed.
+
+        Copy-on-write: the index dicts are shallow-copied and only the posting
+        lists of touched drugs are rebuilt, so this catalog is never modified
+        and readers still holding it keep a consistent view.
+        """
+        new = object.__new__(MedicineCatalog)
+        new.by_name = dict(self.by_name)
+        new.by_ingredient = dict(self.by_ingredient)
+        new.ingredients_of = dict(self.ingredients_of)
+        new.by_composition = dict(self.by_composition)
+        new._order = dict(self._order)
+        next_order = max(self._order.values(), default=-1) + 1
+
+        touched = set()
+        for name in deletes:
+            key = normalize_name(name)
+            if key in new.by_name:
+                new._unindex(key)
+                del new.by_name[key]
+                del new._order[key]
+                touched.add(key)
+        for raw in upserts:
+            if not isinstance(raw, Mapping) or not raw.get("Drug Name"):
+                continue
+            item = {field: (raw.get(field) or "") for field in FIELDS}
+            key = normalize_name(item["Drug Name"])
+            if key in new.by_name:
+                new._unindex(key)
+            else:
+                new._order[key] = next_order
+                next_order += 1
+            new.by_name[key] = item
+            new._index(key, item)
+            touched.add(key)
+
+        # Duplicate rows of a touched drug collapse into its single new record
+        new.records = [r for r in self.records if normalize_name(r["Drug Name"]) not in touched]
+        new.records += [new.by_name[k] for k in touched if k in new.by_name]
+        return new
+
+    def _index(self, key, item):
+        # New lists rather than append(): the old ones may be shared with another catalog
+        ingredients = parse_ingredients(item["Active Ingredient"])
+        self.ingredients_of[key] = ingredients
+        if ingredients:
+            self.by_composition[ingredients] = self.by_composition.get(ingredients, []) + [key]
+        for ingredient in ingredients:
+            self.by_ingredient[ingredient] = self.by_ingredient.get(ingredient, []) + [key]
+
+    def _unindex(self, key):
+        ingredients = self.ingredients_of.pop(key, frozenset())
+        postings = [(self.by_ingredient, i) for i in ingredients]
+        if ingredients:
+            postings.append((self.by_composition, ingredients))
+        for index, term in postings:
+            keys = [k for k in index.get(term, ()) if k != key]
+            if keys:
+                index[term] = keys
+            else:
+                index.pop(term, None)
+
+    @classmethod
+    def from_json(cls, path=DATA_FILE):
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_binary(cls, path):
+        from catalog_store import CatalogFile
+
+        catalog_file = CatalogFile(path)
+        return cls(catalog_file.records(), normalized=True, index=catalog_file.index)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, name):
+        return normalize_name(name) in self.by_name
+
+    def get(self, name):
+        return self.by_name.get(normalize_name(name))
+
+    def names(self):
+        return list(self.by_name)
+
+    def alternates(self, name, limit=None):
+        """Other brands with exactly the same ingredient set as `name`."""
+        key = normalize_name(name)
+        ingredients = self.ingredients_of.get(key)
+        if not ingredients:
+            return []
+        keys = [k for k in self.by_composition[ingredients] if k != key][:limit]
+        return [self.by_name[k] for k in keys]
+
+    def with_ingredients(self, ingredients, mode="any"):
+        """Drugs containing any (or all, with mode="all") of the given ingredients."""
+        wanted = set()
+        for text in ingredients:
+            wanted |= parse_ingredients(text)
+        postings = [set(self.by_ingredient.get(i, ())) for i in wanted]
+        if not postings:
+            return []
+        if mode == "all":
+            keys = set.intersection(*sorted(postings, key=len))
+        else:
+            keys = set.union(*postings)
+        # Catalog order keeps results stable between calls
+        return [self.by_name[k] for k in sorted(keys, key=self._order.__getitem__)]
+
+
+def load_catalog(path=DATA_FILE):
+    """Read the catalog from disk.
+
+    Uses the compact medicine_catalog.bin when it is at least as new as the
+    JSON (see catalog_store.py), otherwise parses the JSON.
+    """
+    from catalog_store import CATALOG_BIN, is_fresh
+
+    if is_fresh(path, CATALOG_BIN):
+        return MedicineCatalog.from_binary(CATALOG_BIN)
+    return MedicineCatalog.from_json(path)
+
+
+def get_catalog(path=DATA_FILE):
+    """Process-wide catalog shared by both apps and the category pages.
+
+    The current snapshot of the hot-reloaded catalog (see catalog_reload.py);
+    take it once per request or rerun and use that object throughout.
+    """
+    from catalog_reload import get_live_catalog
+
+    return get_live_catalog(path).catalog
@@ -0,0 +1,178 @@
+"""Lightweight in-process metrics: per-stage latency histograms and counters.
+
+    from metrics import METRICS
+    with METRICS.stage("ocr"):
+        ...
+    METRICS.inc("cache_hits_total", cache="summary")
+
+Stages: decode, crop, preprocess, ocr, match, embed, search, prompt,
+generate, generate_first_token, render, catalog_reload, check. METRICS.render() is
+the Prometheus text format, served at /metrics by api.py and model_server.py;
+the Streamlit apps serve it on MEDIBOT_METRICS_PORT when that is set, bound to
+MEDIBOT_METRICS_HOST (127.0.0.1 by default; 0.0.0.0 for a remote scraper). Metrics
+are per process, so scrape every worker. With MEDIBOT_ADMIN=1 the apps show the same numbers in a
+sidebar panel.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import streamlit as st
+
+METRICS_PORT = int(os.environ.get("MEDIBOT_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("MEDIBOT_METRICS_HOST", "127.0.0.1")
+ADMIN = os.environ.get("MEDIBOT_ADMIN", "0") == "1"
+
+# Seconds; matching and prompt building land in the sub-millisecond buckets,
+# beam search on CPU in the multi-second ones
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+COUNTER_HELP = {
+    "cache_hits_total": "Summary and OCR lookups answered from a cache, by cache.",
+    "cache_misses_total": "Summary and OCR lookups that had to run the model, by cache.",
+    "catalog_changes_total": "Drugs added, edited or removed by catalog hot reload.",
+    "ocr_tokens_total": "OCR text boxes considered as drug names.",
+    "ocr_tokens_rejected_total": "OCR text boxes dropped for confidence below 0.4.",
+    "regeneration_attempts_total": "generate calls made to regenerate a summary (one per click).",
+    "summaries_rejected_total": "Model-written summaries replaced by the template for breaking the output contract, by reason.",
+    "summaries_regenerated_total": "Summaries replaced through the regenerate button.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (inf past the last bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    def __init__(self, prefix="medibot"):
+        self.prefix = prefix
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            name = f"{self.prefix}_stage_seconds"
+            lines += [f"# HELP {name} Latency of each pipeline stage.", f"# TYPE {name} histogram"]
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets, h.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {h.sum:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {h.count}')
+
+            by_name = {}
+            for (counter, labels), value in self.counters.items():
+                by_name.setdefault(counter, []).append((labels, value))
+            for counter in sorted(set(COUNTER_HELP) | set(by_name)):
+                full = f"{self.prefix}_{counter}"
+                lines += [f"# HELP {full} {COUNTER_HELP.get(counter, counter)}", f"# TYPE {full} counter"]
+                for labels, value in sorted(by_name.get(counter, [((), 0)])):
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{full}{{{label_text}}} {value}" if label_text else f"{full} {value}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@st.cache_resource(show_spinner=False)
+def serve_metrics(port=METRICS_PORT, host=METRICS_HOST):
+    """Start the /metrics endpoint for a Streamlit process, once; no-op without a port."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+
+def _ms(seconds):
+    if seconds is None:
+        return "-"
+    return "> 60 s" if seconds == float("inf") else f"≤ {seconds * 1000:g} ms"
+
+
+def admin_panel():
+    """Sidebar expander with stage latencies and counters, shown when MEDIBOT_ADMIN=1."""
+    if not ADMIN:
+        return
+    with st.sidebar.expander("📈 Metrics", expanded=False):
+        rows = [
+            {"stage": stage, "count": h.count,
+             "mean": f"{h.sum / h.count * 1000:.1f} ms" if h.count else "-",
+             "p50": _ms(h.quantile(0.5)), "p95": _ms(h.quantile(0.95))}
+            for stage, h in sorted(METRICS.histograms.items())
+        ]
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("No requests timed yet.")
+        for (name, labels), value in sorted(METRICS.counters.items()):
+            label_text = ", ".join(f"{k}={v}" for k, v in labels)
+            st.caption(f"{name}{f' ({label_text})' if label_text else ''}: **{value}**")
+        if METRICS_PORT:
+            st.caption(f"Prometheus: :{METRICS_PORT}/metrics")
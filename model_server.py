@@ -0,0 +1,280 @@
+"""Local inference daemon that owns the flan-t5 model and the easyocr reader.
+
+    python model_server.py --port 8765 --max-batch 8 --max-wait-ms 25
+
+Streamlit front ends become thin clients when MEDIBOT_MODEL_SERVER points at
+it (e.g. MEDIBOT_MODEL_SERVER=http://127.0.0.1:8765), so running several apps
+or replicas keeps a single copy of the models in memory.
+
+Endpoints (JSON unless noted):
+    GET  /health                       -> {"ok": true, "backend": ..., "params": ...}
+    GET  /metrics                      -> Prometheus text (see metrics.py)
+    POST /summarize  {"prompts": [..]} -> {"summaries": [..]}
+    POST /stream     {"prompt": ".."}  -> JSON lines {"text": ..} then {"stats": ..} or {"error": ..}
+    POST /candidates {"prompt": "..", "n": 4} -> {"candidates": [..]} (sampled, for regeneration)
+    POST /ocr        raw image bytes   -> {"results": [[box, text, prob], ..]}
+"""
+import argparse
+import io
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from metrics import METRICS
+from summarizer import REGENERATE_CANDIDATES, Summarizer
+
+MODEL_SERVER = os.environ.get("MEDIBOT_MODEL_SERVER", "")
+
+
+class MicroBatcher:
+    """Collects prompts from concurrent requests into shared generate calls.
+
+    The first queued prompt opens a window of `max_wait` seconds; everything
+    that arrives before it closes (up to `max_batch`) is decoded together.
+    """
+
+    def __init__(self, summarizer, lock, max_batch=8, max_wait=0.025):
+        self.summarizer = summarizer
+        self.lock = lock
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.prompts = 0
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, prompts):
+        futures = []
+        for prompt in prompts:
+            future = Future()
+            self.queue.put((prompt, future))
+            futures.append(future)
+        return [future.result() for future in futures]
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with self.lock:
+                    summaries = self.summarizer.generate_batch([prompt for prompt, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.prompts += len(batch)
+            for (_, future), summary in zip(batch, summaries):
+                future.set_result(summary)
+
+
+class ModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, summarizer, ocr, max_batch, max_wait):
+        super().__init__(address, ModelRequestHandler)
+        self.summarizer = summarizer
+        self.ocr = ocr
+        self.model_lock = threading.Lock()
+        self.batcher = MicroBatcher(summarizer, self.model_lock, max_batch, max_wait)
+
+
+class ModelRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            body = METRICS.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != "/health":
+            return self._send_json({"error": "not found"}, 404)
+        batcher = self.server.batcher
+        self._send_json({
+            "ok": True,
+            "backend": self.server.summarizer.backend,
+            "params": self.server.summarizer.params,
+            "stream_params": self.server.summarizer.stream_params,
+            "batches": batcher.batches,
+            "prompts": batcher.prompts,
+            "ocr": self.server.ocr.stats(),
+        })
+
+    def do_POST(self):
+        try:
+            if self.path == "/summarize":
+                prompts = json.loads(self._body())["prompts"]
+                return self._send_json({"summaries": self.server.batcher.submit(prompts)})
+            if self.path == "/stream":
+                return self._stream(json.loads(self._body())["prompt"])
+            if self.path == "/candidates":
+                request = json.loads(self._body())
+                with self.server.model_lock:
+                    candidates = self.server.summarizer.generate_candidates(request["prompt"], request.get("n", REGENERATE_CANDIDATES))
+                return self._send_json({"candidates": candidates})
+            if self.path == "/ocr":
+                return self._send_json({"results": self._ocr(self._body())})
+        except Exception as e:
+            return self._send_json({"error": str(e)}, 500)
+        self._send_json({"error": "not found"}, 404)
+
+    def _stream(self, prompt):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        stats = {}
+        # The 200 header is already out, so a failure has to travel as the last line
+        try:
+            with self.server.model_lock:
+                for text in self.server.summarizer.stream_summary_text(prompt, stats):
+                    self.wfile.write((json.dumps({"text": text}) + "\n").encode("utf-8"))
+                    self.wfile.flush()
+            last = {"stats": stats}
+        except Exception as e:
+            last = {"error": str(e)}
+        self.wfile.write((json.dumps(last) + "\n").encode("utf-8"))
+        self.close_connection = True
+
+    def _ocr(self, image_bytes):
+        # Clients already preprocessed the image
+        results = self.server.ocr.readtext(image_bytes, preprocess=False)
+        return [
+            [[[float(x), float(y)] for x, y in box], text, float(prob)]
+            for box, text, prob in results
+        ]
+
+
+# --- Thin clients used by the Streamlit apps ---
+
+def _post(url, body, content_type="application/json", timeout=600):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+class RemoteSummarizer(Summarizer):
+    """Summarizer whose generation runs in the model server; caching stays local."""
+
+    def __init__(self, url=MODEL_SERVER, cache=None, pregenerated=None):
+        self.url = url.rstrip("/")
+        with urllib.request.urlopen(self.url + "/health", timeout=10) as response:
+            health = json.load(response)
+        super().__init__(None, None, cache, pregenerated, backend=health["backend"])
+        # Use the server's fingerprints so cached entries match what it generates
+        self.params = health["params"]
+        self.stream_params = health["stream_params"]
+
+    def generate_batch(self, prompts):
+        body = json.dumps({"prompts": list(prompts)}).encode("utf-8")
+        with METRICS.stage("generate"), _post(self.url + "/summarize", body) as response:
+            return json.load(response)["summaries"]
+
+    def generate_summary_text(self, prompt):
+        return self.generate_batch([prompt])[0]
+
+    def generate_candidates(self, prompt, n=REGENERATE_CANDIDATES):
+        # The server keeps the encoder outputs, so repeat regenerations skip the encoder there
+        body = json.dumps({"prompt": prompt, "n": n}).encode("utf-8")
+        with METRICS.stage("generate"), _post(self.url + "/candidates", body) as response:
+            return json.load(response)["candidates"]
+
+    def buckets(self, prompts, batch_size):
+        # The server batches across sessions, so send everything in one request
+        return [list(range(len(prompts)))]
+
+    def stream_summary_text(self, prompt, stats=None):
+        body = json.dumps({"prompt": prompt}).encode("utf-8")
+        start = time.perf_counter()
+        first_token = None
+        with _post(self.url + "/stream", body) as response:
+            for line in response:
+                message = json.loads(line)
+                if "text" in message:
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    yield message["text"]
+                elif "error" in message:
+                    raise RuntimeError(f"Model server failed mid-stream: {message['error']}")
+                elif stats is not None:
+                    stats.update(message["stats"])
+        elapsed = time.perf_counter() - start
+        METRICS.observe("generate", elapsed)
+        METRICS.observe("generate_first_token", first_token if first_token is not None else elapsed)
+
+
+class RemoteReader:
+    """Drop-in for easyocr.Reader.readtext backed by the model server."""
+
+    def __init__(self, url=MODEL_SERVER):
+        self.url = url.rstrip("/")
+
+    def readtext(self, image, detail=1):
+        import numpy as np
+        from PIL import Image
+
+        if isinstance(image, (bytes, bytearray)):
+            body = bytes(image)
+        else:
+            if isinstance(image, np.ndarray):
+                image = Image.fromarray(image)
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG")
+            body = buffer.getvalue()
+        with _post(self.url + "/ocr", body, "application/octet-stream") as response:
+            results = [tuple(r) for r in json.load(response)["results"]]
+        return results if detail else [text for _, text, _ in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medi-Bot shared model server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=25)
+    parser.add_argument("--ocr-tiles", type=int, default=0,
+                        help="split tall images into N strips OCR'd in parallel processes")
+    parser.add_argument("--backend", default=None, help="inference backend (default: MEDIBOT_BACKEND or torch)")
+    args = parser.parse_args()
+
+    from ocr_service import OCRService
+    from summarizer import load_model
+
+    tokenizer, model = load_model(backend=args.backend)
+    summarizer = Summarizer(tokenizer, model, backend=args.backend)
+    ocr = OCRService(tiles=args.ocr_tiles).warm()
+
+    server = ModelServer((args.host, args.port), summarizer, ocr, args.max_batch, args.max_wait_ms / 1000)
+    print(f"Medi-Bot model server on http://{args.host}:{args.port} ({summarizer.backend})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import streamlit as st
+from PIL import Image
+
+from image_preprocess import Preprocessor
+from metrics import METRICS
+from model_server import MODEL_SERVER, RemoteReader
+
+
+def to_array(image):
+    """RGB numpy array from a numpy array, PIL image, raw bytes or file-like upload."""
+    if isinstance(image, np.ndarray):
+        return image
+    if isinstance(image, Image.Image):
+        return np.array(image.convert("RGB"))
+    with METRICS.stage("decode"):
+        if isinstance(image, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image))
+        else:
+            image = Image.open(image)
+        return np.array(image.convert("RGB"))
+
+
+OCR_TILES = int(os.environ.get("MEDIBOT_OCR_TILES", "0"))
+# Opt-in until benchmarks/bench_ocr.py shows it keeps drug-name recall on real prescriptions
+PREPROCESS = os.environ.get("MEDIBOT_OCR_PREPROCESS", "0") == "1"
+
+# --- Tiled OCR ---
+# Each pool worker process owns its own easyocr reader.
+_tile_reader = None
+
+
+def _init_tile_worker(languages, threads):
+    global _tile_reader
+    import easyocr
+    import torch
+
+    torch.set_num_threads(threads)
+    _tile_reader = easyocr.Reader(languages, gpu=False)
+
+
+def _read_tile(tile, y_offset):
+    results = _tile_reader.readtext(tile)
+    return [
+        ([[float(x), float(y) + y_offset] for x, y in box], text, float(prob))
+        for box, text, prob in results
+    ]
+
+
+def split_strips(height, tiles, overlap):
+    """(top, bottom) rows of `tiles` horizontal strips overlapping by `overlap` px.
+
+    The overlap must exceed a text line's height so every line is whole in at
+    least one strip.
+    """
+    step = height / tiles
+    return [
+        (max(0, int(i * step) - overlap // 2), min(height, int((i + 1) * step) + overlap // 2))
+        for i in range(tiles)
+    ]
+
+
+def _bounds(box):
+    xs = [p[0] for p in box]
+    ys = [p[1] for p in box]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def merge_tiles(results, min_overlap=0.5):
+    """Drop duplicate detections from strip overlaps, keeping the most complete box."""
+    # Bigger boxes first: a line cut by a seam is a smaller box inside the full one
+    ranked = sorted(results, key=lambda r: (-_area(_bounds(r[0])), -r[2]))
+    kept = []
+    for box, text, prob in ranked:
+        b = _bounds(box)
+        if any(_overlap(b, _bounds(k[0])) > min_overlap for k in kept):
+            continue
+        kept.append((box, text, prob))
+    # Reading order: top to bottom, then left to right
+    return sorted(kept, key=lambda r: (round(_bounds(r[0])[1] / 10), _bounds(r[0])[0]))
+
+
+def _area(b):
+    return max(0.0, b[2] - b[0]) * max(0.0, b[3] - b[1])
+
+
+def _overlap(a, b):
+    # Intersection over the smaller box
+    inter = (max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+             * max(0.0, min(a[3], b[3]) - max(a[1], b[1])))
+    smaller = min(_area(a), _area(b))
+    return inter / smaller if smaller else 0.0
+
+
+def ocr_cache_key(image_bytes, box=None):
+    """Identity of one OCR request: the uploaded bytes plus the crop rectangle."""
+    digest = hashlib.sha1(image_bytes).hexdigest()
+    if box is None:
+        return digest
+    return f"{digest}:{box['left']},{box['top']},{box['width']},{box['height']}"
+
+
+class OCRService:
+    """One warmed easyocr reader shared by every session, with timing metrics.
+
+    Images go to easyocr as in-memory arrays; nothing is written to disk. An
+    optional Preprocessor shrinks and cleans them first.
+    """
+
+    def __init__(self, languages=("en",), gpu=False, reader=None, preprocessor=None, cache_entries=64,
+                 tiles=0, tile_overlap=96, min_tile_height=320):
+        self.languages = list(languages)
+        self.gpu = gpu
+        self.reader = reader
+        self.preprocessor = preprocessor
+        self.preprocess_seconds = 0.0
+        self.cache_entries = cache_entries
+        self.tiles = tiles
+        self.tile_overlap = tile_overlap
+        self.min_tile_height = min_tile_height
+        self._pool = None
+        self._pool_workers = 0
+        self.results = OrderedDict()
+        self.cache_hits = 0
+        self.load_seconds = 0.0
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self._load_lock = threading.Lock()
+        self._run_lock = threading.Lock()
+
+    def warm(self):
+        with self._load_lock:
+            if self.reader is None:
+                import easyocr
+
+                start = time.perf_counter()
+                self.reader = easyocr.Reader(self.languages, gpu=self.gpu)
+                self.load_seconds = time.perf_counter() - start
+        return self
+
+    def readtext(self, image, detail=1, preprocess=True, tiles=None):
+        """OCR one image. `tiles` > 1 splits tall images into strips read in parallel."""
+        img = to_array(image)
+        if preprocess and self.preprocessor is not None:
+            start = time.perf_counter()
+            img, _ = self.preprocessor(img)
+            self.preprocess_seconds = time.perf_counter() - start
+            METRICS.observe("preprocess", self.preprocess_seconds)
+        tiles = self.tiles if tiles is None else tiles
+        tiles = min(tiles, img.shape[0] // self.min_tile_height)
+
+        start = time.perf_counter()
+        if tiles > 1:
+            results = self._readtext_tiled(img, tiles)
+            if not detail:
+                results = [text for _, text, _ in results]
+        else:
+            self.warm()
+            # easyocr readers are not safe to share between threads mid-inference
+            with self._run_lock:
+                results = self.reader.readtext(img, detail=detail)
+        elapsed = time.perf_counter() - start
+        METRICS.observe("ocr", elapsed)
+        self.calls += 1
+        self.total_seconds += elapsed
+        self.last_seconds = elapsed
+        return results
+
+    def _readtext_tiled(self, img, tiles):
+        with self._load_lock:
+            if self._pool is None or self._pool_workers < tiles:
+                if self._pool is not None:
+                    self._pool.shutdown()
+                threads = max(1, (os.cpu_count() or 1) // tiles)
+                self._pool = ProcessPoolExecutor(
+                    tiles, mp_context=get_context("spawn"),
+                    initializer=_init_tile_worker, initargs=(self.languages, threads),
+                )
+                self._pool_workers = tiles
+        futures = [
+            self._pool.submit(_read_tile, img[top:bottom], top)
+            for top, bottom in split_strips(img.shape[0], tiles, self.tile_overlap)
+        ]
+        return merge_tiles([r for future in futures for r in future.result()])
+
+    def cached_result(self, key, detail=1):
+        with self._load_lock:
+            results = self.results.get((key, detail))
+            if results is not None:
+                self.results.move_to_end((key, detail))
+                self.cache_hits += 1
+                METRICS.inc("cache_hits_total", cache="ocr")
+            return results
+
+    def readtext_cached(self, key, image, detail=1):
+        """readtext() memoized on a caller-supplied key such as ocr_cache_key()."""
+        results = self.cached_result(key, detail)
+        if results is None:
+            METRICS.inc("cache_misses_total", cache="ocr")
+            results = self.readtext(image, detail=detail)
+            with self._load_lock:
+                self.results[(key, detail)] = results
+                while len(self.results) > self.cache_entries:
+                    self.results.popitem(last=False)
+        return results
+
+    def stats(self):
+        return {
+            "load_seconds": self.load_seconds,
+            "calls": self.calls,
+            "last_seconds": self.last_seconds,
+            "preprocess_seconds": self.preprocess_seconds,
+            "mean_seconds": self.total_seconds / self.calls if self.calls else 0.0,
+            "cache_hits": self.cache_hits,
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_ocr_service():
+    preprocessor = Preprocessor() if PREPROCESS else None
+    if MODEL_SERVER:
+        # The model server holds the reader; preprocessing here ships it a much smaller image
+        return OCRService(reader=RemoteReader(MODEL_SERVER), preprocessor=preprocessor)
+    # Not warmed here: warmup.get_warmup() loads the reader on a background thread
+    return OCRService(preprocessor=preprocessor, tiles=OCR_TILES)
@@ -1,15 +1,9 @@
 import streamlit as st
-import base64
+from static_assets import asset_url
 
 # --- 1. CONFIG ---
 st.set_page_config(page_title="Baby Care - MediBot", layout="wide", initial_sidebar_state="collapsed")
 
-def get_base64_image(image_path):
-    try:
-        with open(image_path, "rb") as img_file:
-            return base64.b64encode(img_file.read()).decode()
-    except: return ""
-
 # --- 2. CSS ---
 st.markdown("""
 <style>
@@ -88,12 +82,12 @@ items = [
 cols = st.columns(3)
 for i, item in enumerate(items):
     with cols[i % 3]:
-        img_b64 = get_base64_image(item['img'])
+        img_url = asset_url(item['img'])
         
         # Consistent styling: 300x300 fixed frame
         st.markdown(f"""
             <div class="product-card">
-                <img src="data:image/jpeg;base64,{img_b64}" style="width:300px; height:300px; object-fit:cover; border-radius:8px;">
+                <img src="{img_url}" style="width:300px; height:300px; object-fit:cover; border-radius:8px;">
                 <h3>{item['name']}</h3>
             </div>
         """, unsafe_allow_html=True)
@@ -0,0 +1,156 @@
+"""Background OCR and summary generation shared by every Streamlit session.
+
+The script thread only submits work and renders whatever is ready; a
+fragment polls until the job finishes. OCR and generation each get their own
+small thread pool, so one user's multi-second generate call does not hold up
+another user's page, and the CPU box never runs more model calls at once than
+there are workers.
+
+Backpressure: each pool accepts at most `max_pending` queued jobs. Past that,
+submissions are refused (None / False) and the UI keeps polling and retrying
+instead of piling more work onto an overloaded box.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from ocr_service import get_ocr_service
+from warmup import get_summarizer
+
+OCR_WORKERS = int(os.environ.get("MEDIBOT_OCR_WORKERS", "1"))
+GEN_WORKERS = int(os.environ.get("MEDIBOT_GEN_WORKERS", "1"))
+MAX_PENDING = int(os.environ.get("MEDIBOT_MAX_PENDING", "8"))
+
+
+class SummaryJob:
+    """Summaries for one result list, filled in by a generation worker.
+
+    texts[i] holds the latest (possibly partial, when streaming) summary of
+    items[i]; done[i] turns True once it is final.
+    """
+
+    def __init__(self, items, variants, stream=False):
+        self.items = list(items)
+        self.variants = list(variants)
+        self.stream = stream
+        self.texts = [None] * len(self.items)
+        self.done = [False] * len(self.items)
+        self.stats = [None] * len(self.items)
+        self.future = None
+        self.error = None
+
+    @property
+    def pending(self):
+        return [i for i, done in enumerate(self.done) if not done]
+
+    @property
+    def waiting(self):
+        """Misses exist but no worker has accepted them yet (pool was full)."""
+        return self.future is None and bool(self.pending) and self.error is None
+
+    def finished(self):
+        return self.error is not None or not self.pending
+
+
+class Pipeline:
+    def __init__(self, ocr, summarizer, ocr_workers=OCR_WORKERS, gen_workers=GEN_WORKERS,
+                 max_pending=MAX_PENDING):
+        self.ocr = ocr
+        self.summarizer = summarizer
+        self.ocr_pool = ThreadPoolExecutor(ocr_workers, thread_name_prefix="ocr")
+        self.gen_pool = ThreadPoolExecutor(gen_workers, thread_name_prefix="generate")
+        # Running plus queued jobs per pool
+        self._ocr_slots = threading.BoundedSemaphore(ocr_workers + max_pending)
+        self._gen_slots = threading.BoundedSemaphore(gen_workers + max_pending)
+        self._ocr_jobs = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def submit_ocr(self, key, image):
+        """Future for OCR of `image`, shared by every session asking for the same key.
+
+        Returns None when the OCR queue is full.
+        """
+        with self._lock:
+            future = self._ocr_jobs.get(key)
+            if future is not None:
+                return future
+            if not self._ocr_slots.acquire(blocking=False):
+                self.rejected += 1
+                return None
+            future = self.ocr_pool.submit(self.ocr.readtext_cached, key, image)
+            self._ocr_jobs[key] = future
+        future.add_done_callback(lambda _: self._ocr_finished(key))
+        return future
+
+    def _ocr_finished(self, key):
+        with self._lock:
+            self._ocr_jobs.pop(key, None)
+        self._ocr_slots.release()
+
+    def submit_summaries(self, items, variants, stream=False):
+        """SummaryJob with cached summaries filled in and the misses queued for generation."""
+        job = SummaryJob(items, variants, stream)
+        for i, (item, variant) in enumerate(zip(job.items, job.variants)):
+            summary = self.summarizer.cached(item, variant)
+            if summary is None and stream:
+                summary = self.summarizer.cached(item, variant, self.summarizer.stream_params)
+            if summary is not None:
+                job.texts[i] = summary
+                job.done[i] = True
+        self.schedule(job)
+        return job
+
+    def schedule(self, job):
+        """Queue a job's misses; False if the generation queue is full (retry later)."""
+        if not job.waiting:
+            return True
+        if not self._gen_slots.acquire(blocking=False):
+            self.rejected += 1
+            return False
+        job.future = self.gen_pool.submit(self._generate, job)
+        job.future.add_done_callback(lambda _: self._gen_slots.release())
+        return True
+
+    def _generate(self, job):
+        pending = job.pending
+        try:
+            if job.stream:
+                for i in pending:
+                    stats = {}
+                    for text in self.summarizer.stream_summarize(job.items[i], job.variants[i], stats):
+                        job.texts[i] = text
+                    job.stats[i] = stats
+                    job.done[i] = True
+            else:
+                items = [job.items[i] for i in pending]
+                variants = [job.variants[i] for i in pending]
+                for j, summary in self.summarizer.summarize_many(items, variants):
+                    job.texts[pending[j]] = summary
+                    job.done[pending[j]] = True
+        except Exception as e:
+            job.error = e
+
+    def stats(self):
+        return {
+            "ocr_running": len(self._ocr_jobs),
+            "generate_queued": self.gen_pool._work_queue.qsize(),
+            "rejected": self.rejected,
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_pipeline():
+    return Pipeline(get_ocr_service(), get_summarizer())
+
+
+def poll_until(ready, interval=0.5):
+    """Fragment that reruns the whole script once `ready()` turns True."""
+    @st.fragment(run_every=interval)
+    def poll():
+        if ready():
+            st.rerun()
+
+    poll()
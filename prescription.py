@@ -0,0 +1,83 @@
+"""Prescription logic shared by the Streamlit chatbot (flaskapp.py) and the REST API (api.py).
+
+Nothing here touches the Streamlit UI; the OCR service, catalog, matcher and
+summarizer are passed in by the caller.
+"""
+import re
+
+from drug_matcher import resolve
+from metrics import METRICS
+from summarizer import DETAILED_VARIANTS, pick_variant
+
+MEDICINE_TYPES = ['TAB', 'CAP', 'INJ', 'SYR']
+
+
+def extract_medicines_from_image(img, ocr, catalog, matcher):
+    # Step 1: OCR the in-memory image with the shared, already-loaded reader
+    result = ocr.readtext(img, detail=0)
+
+    # Step 2: Reconstruct lines like TAB XYZ, CAP XYZ, INJ XYZ, SYR XYZ, handling various formats
+    grouped = []
+    i = 0
+    while i < len(result):
+        # Check if current line starts with a valid medicine type (case-insensitive)
+        if result[i].strip().upper() in MEDICINE_TYPES:
+            line = result[i].strip() + " "
+            i += 1
+            # Check if next line exists and is not a new medicine type
+            if i < len(result) and result[i].strip().upper() not in MEDICINE_TYPES:
+                # Handle cases like "TAB - A", "TAB A", "TAB – A", or "TAB\nA"
+                line += result[i].strip()
+                i += 1
+            grouped.append(line.strip())
+        else:
+            # Handle standalone medicine names or other text
+            grouped.append(result[i].strip())
+            i += 1
+
+    # Step 3: Extract medicine names using regex
+    # Regex to match medicine type (TAB, CAP, INJ, SYR) followed by optional separator (-, –, space) and name.
+    # Digits are allowed in the name because OCR often reads letters as digits ("Nap4").
+    pattern = re.compile(r"^(TAB|CAP|INJ|SYR)\s*[-–]?\s*([A-Z0-9\s]+)$", re.IGNORECASE)
+    name_pattern = re.compile(r"^[A-Z\s]+$", re.IGNORECASE)
+    extracted = []
+    for line in grouped:
+        match = pattern.search(line)
+        candidate = match.group(2) if match else line
+
+        # Step 4: Snap the candidate to the closest catalog name
+        item, _ = resolve(candidate, catalog, matcher)
+        if item is not None:
+            name = item['Drug Name']
+        elif name_pattern.search(candidate):
+            # Handle cases where only medicine name appears (e.g., standalone "A")
+            name = candidate.strip().title()
+        else:
+            continue
+        if name not in extracted:
+            extracted.append(name)
+
+    return extracted
+
+
+def regenerate_summary(item, old_summary, summarizer):
+    """A new wording for the regenerate button, or None if none kept the facts; one generate call."""
+    METRICS.inc("summaries_regenerated_total")
+    return summarizer.regenerate(item, pick_variant(DETAILED_VARIANTS, item), old_summary)
+
+
+def get_item(drug_name, catalog):
+    item = catalog.get(drug_name)
+    if item is None:
+        return None, f"No information found for '{drug_name}'."
+    return item, None
+
+
+def find_alternates(current_drug_name, catalog, max_alternates=2):
+    # Same normalized ingredient set via the catalog's ingredient index, no DataFrame scan
+    alternates = [alt['Drug Name'] for alt in catalog.alternates(current_drug_name, max_alternates)]
+
+    # If no alternates found, return a special message
+    if not alternates:
+        return ["🙏 No alternates available in my dataset"]
+    return alternates
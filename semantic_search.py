@@ -0,0 +1,307 @@
+"""Condition search ("anxiety with panic") over the catalog's indication text.
+
+    python semantic_search.py                              # embed the catalog -> search_index.json + .npy
+    python semantic_search.py --query "anxiety with panic"
+
+Offline, each drug's indication, active ingredient and side effects are
+embedded with a small sentence encoder (all-MiniLM-L6-v2: 384 dimensions,
+fast on CPU), mean-pooled and scaled to unit length, and saved as one float32
+matrix. The apps open it with np.load(mmap_mode="r"), so the pages are shared
+between processes and nothing is read until the first query. A search is one
+matrix product of the query vectors against that matrix (cosine similarity,
+since every row has unit length) and an argpartition for the top k, with no
+Python loop over drugs. Large catalogs are also clustered, so a query scores
+only the rows of its nearest clusters (see SemanticIndex).
+
+search_index.json is a manifest: model, keys, cluster offsets and the names of
+the matrix files of that build (search_index.<version>.npy). A rebuild writes
+new files and then swaps the manifest in with one rename, so readers see
+either the old keys and vectors or the new ones, never a mix.
+
+The index is keyed by normalized drug name. Edits picked up by
+catalog_reload.py show their new text straight away; their vectors, and drugs
+added since, wait for the next rebuild.
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import streamlit as st
+
+from medicine_catalog import load_catalog
+from metrics import METRICS
+
+EMBED_MODEL = os.environ.get("MEDIBOT_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+INDEX_FILE = os.environ.get("MEDIBOT_SEARCH_INDEX", "search_index.json")
+# Cosine similarity below which a drug is not worth showing
+MIN_SCORE = 0.3
+# Catalogs this size and up get a cluster index; a query scores NPROBE clusters
+CLUSTER_MIN = 20000
+NPROBE = 16
+
+
+def document(item):
+    """The text embedded for one drug."""
+    parts = [
+        item["Indication"],
+        f"Active ingredient: {item['Active Ingredient']}" if item["Active Ingredient"] else "",
+        f"Side effects: {item['Side Effects']}" if item["Side Effects"] else "",
+    ]
+    return ". ".join(p.strip().rstrip(".") for p in parts if p.strip())
+
+
+def meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def data_path(path, version, kind="vectors"):
+    """The matrix file of one build: search_index.<version>.npy or .<version>.centroids.npy."""
+    suffix = ".npy" if kind == "vectors" else f".{kind}.npy"
+    return f"{os.path.splitext(path)[0]}.{version}{suffix}"
+
+
+class Encoder:
+    """Mean-pooled, unit-length sentence embeddings from a small transformer encoder."""
+
+    def __init__(self, model_name=EMBED_MODEL, max_length=256):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        self.model_name = model_name
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name)
+        self.model.eval()
+
+    def encode(self, texts, batch_size=64):
+        """(len(texts), dim) float32 array."""
+        torch = self.torch
+        vectors = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(list(texts[start:start + batch_size]), padding=True, truncation=True,
+                                   max_length=self.max_length, return_tensors="pt")
+            with torch.inference_mode():
+                hidden = self.model(**batch).last_hidden_state
+            mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            vectors.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+        return np.concatenate(vectors).astype(np.float32)
+
+
+def cluster(vectors, n_clusters, iterations=10, seed=0, chunk=16384):
+    """Spherical k-means: (unit centroids, cluster id per row)."""
+    rng = np.random.default_rng(seed)
+    centroids = np.array(vectors[rng.choice(len(vectors), n_clusters, replace=False)])
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for _ in range(iterations):
+        for start in range(0, len(vectors), chunk):
+            assign[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        # Per-cluster sums from one sort and a segmented reduce
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=n_clusters)
+        starts = np.cumsum(counts) - counts
+        sums = np.zeros_like(centroids)
+        sums[counts > 0] = np.add.reduceat(vectors[order], starts[counts > 0], axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Re-seed clusters that lost every member
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()), replace=False)]
+        norms[empty] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+    return centroids, assign
+
+
+class SemanticIndex:
+    """Unit-length drug vectors with batched top-k cosine search.
+
+    Past CLUSTER_MIN drugs the rows are grouped by k-means cluster (stored
+    contiguously, `offsets` marking each cluster's slice) and a query only
+    scores the `nprobe` clusters whose centroids are closest to it, instead
+    of every row.
+    """
+
+    def __init__(self, vectors, keys, model_name=EMBED_MODEL, centroids=None, offsets=None):
+        if len(vectors) != len(keys):
+            raise ValueError(f"{len(vectors)} vectors for {len(keys)} drugs")
+        self.vectors = vectors
+        self.keys = keys
+        self.model_name = model_name
+        self.centroids = centroids
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, vectors, keys, model_name=EMBED_MODEL, cluster_min=None):
+        """Index over `vectors`, clustered when there are at least `cluster_min` of them."""
+        cluster_min = CLUSTER_MIN if cluster_min is None else cluster_min
+        if len(keys) < cluster_min:
+            return cls(vectors, list(keys), model_name)
+        centroids, assign = cluster(vectors, int(np.sqrt(len(keys))))
+        order = np.argsort(assign, kind="stable")
+        offsets = np.searchsorted(assign[order], np.arange(len(centroids) + 1))
+        return cls(np.ascontiguousarray(vectors[order]), [keys[i] for i in order], model_name,
+                   centroids, offsets)
+
+    @classmethod
+    def load(cls, path=INDEX_FILE):
+        with open(meta_path(path), "r") as f:
+            meta = json.load(f)
+        version = meta["version"]
+        centroids = offsets = None
+        if meta.get("offsets") is not None:
+            centroids = np.load(data_path(path, version, "centroids"))
+            offsets = np.asarray(meta["offsets"])
+        return cls(np.load(data_path(path, version), mmap_mode="r"), meta["keys"], meta["model"],
+                   centroids, offsets)
+
+    def save(self, path=INDEX_FILE):
+        # The matrices go to files named after this build, then the manifest that points at
+        # them replaces the old one in a single rename: the only step a reader can observe.
+        manifest = meta_path(path)
+        version = f"{time.time_ns():x}"
+        np.save(data_path(path, version), np.ascontiguousarray(self.vectors, dtype=np.float32))
+        if self.centroids is not None:
+            np.save(data_path(path, version, "centroids"), self.centroids)
+        try:
+            with open(manifest, "r") as f:
+                previous = json.load(f).get("version")
+        except (OSError, ValueError):
+            previous = None
+        with open(manifest + ".tmp", "w") as f:
+            json.dump({"version": version, "model": self.model_name, "dim": int(self.vectors.shape[1]),
+                       "keys": self.keys,
+                       "offsets": None if self.offsets is None else [int(o) for o in self.offsets]}, f)
+        os.replace(manifest + ".tmp", manifest)
+        # Older builds go, except the one just replaced: a reader may have read its
+        # manifest and not opened the matrix yet (an open mapping survives unlinking)
+        base = os.path.splitext(path)[0]
+        for old in glob.glob(glob.escape(base) + ".*.npy"):
+            if old[len(base) + 1:].split(".")[0] not in (version, previous):
+                os.remove(old)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def candidates(self, queries, nprobe):
+        """Row numbers worth scoring for this batch: the union of each query's closest clusters."""
+        if self.centroids is None or nprobe >= len(self.centroids):
+            return None
+        probed = np.unique(np.argpartition(queries @ self.centroids.T, -nprobe, axis=1)[:, -nprobe:])
+        if len(probed) > len(self.centroids) // 2:
+            # A big batch touches most clusters anyway; one full matrix product is cheaper
+            return None
+        return np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in probed])
+
+    def search(self, queries, k=5, min_score=MIN_SCORE, nprobe=NPROBE):
+        """[(key, score), ...] best first, for each row of a (queries, dim) array."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        rows = self.candidates(queries, nprobe)
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        k = min(k, len(vectors))
+        if k <= 0:
+            return [[] for _ in queries]
+        scores = queries @ vectors.T
+        # Top k per row in linear time, then sort only those k
+        top = np.argpartition(scores, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        if rows is not None:
+            top = rows[top]
+        return [
+            [(self.keys[i], float(score)) for i, score in zip(row_ids, row_scores) if score >= min_score]
+            for row_ids, row_scores in zip(top, top_scores)
+        ]
+
+
+def build_index(catalog, encoder, batch_size=64):
+    keys = catalog.names()
+    texts = [document(catalog.by_name[key]) for key in keys]
+    # Similar lengths per batch means little padding; restore catalog order afterwards
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    vectors = np.empty((len(texts), 0), dtype=np.float32)
+    if texts:
+        encoded = encoder.encode([texts[i] for i in order], batch_size)
+        vectors = np.empty_like(encoded)
+        vectors[order] = encoded
+    return SemanticIndex.build(vectors, keys, encoder.model_name)
+
+
+@st.cache_resource(show_spinner=False)
+def get_encoder(model_name=EMBED_MODEL):
+    """Shared query encoder; warmup.py starts loading it at boot when an index exists."""
+    return Encoder(model_name)
+
+
+@st.cache_resource(show_spinner=False)
+def _load_index(path, mtime):
+    return SemanticIndex.load(path)
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get_search_index(path=INDEX_FILE):
+    """The memory-mapped index, or None until `python semantic_search.py` has built it.
+
+    Keyed on the manifest's mtime, so a rebuild is picked up without a restart.
+    """
+    mtime = _mtime(meta_path(path))
+    if mtime is None:
+        return None
+    return _load_index(path, mtime)
+
+
+def search(text, index, encoder, catalog, k=5):
+    """[(record, score)] for a free-text query, best first."""
+    with METRICS.stage("embed"):
+        vector = encoder.encode([text])
+    with METRICS.stage("search"):
+        hits = index.search(vector, k)[0]
+    results = []
+    for key, score in hits:
+        item = catalog.get(key)
+        # Dropped from the catalog since the index was built
+        if item is not None:
+            results.append((item, score))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the Medi-Bot condition search index.")
+    parser.add_argument("--query", action="append", help="search instead of building (repeatable)")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--model", default=EMBED_MODEL)
+    parser.add_argument("--index", default=INDEX_FILE)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    catalog = load_catalog()
+    if args.query:
+        index = SemanticIndex.load(args.index)
+        encoder = Encoder(index.model_name)
+        for query in args.query:
+            start = time.perf_counter()
+            results = search(query, index, encoder, catalog, args.k)
+            print(f"{query!r} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+            for item, score in results:
+                print(f"  {score:.3f}  {item['Drug Name']}: {item['Indication'][:80]}")
+        return
+
+    encoder = Encoder(args.model)
+    start = time.perf_counter()
+    index = build_index(catalog, encoder, args.batch_size)
+    index.save(args.index)
+    print(f"Embedded {len(index)} drugs with {args.model} in {time.perf_counter() - start:.1f}s -> {args.index}")
+
+
+if __name__ == "__main__":
+    main()
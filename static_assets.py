@@ -0,0 +1,89 @@
+"""Page images served as static files instead of inline base64 data URIs.
+
+    python static_assets.py        # pre-build every derived image into static/
+
+The banner and the product photos in Baby/, Skin/ and per/ are resized and
+recompressed once into static/, which Streamlit serves at app/static/ when
+server.enableStaticServing is on (see .streamlit/config.toml). A derived
+file is rebuilt when its source's mtime changes. With static serving off the
+derived file is inlined as a data URI instead, memoized per mtime and still
+a fraction of the original's size.
+"""
+import base64
+import functools
+import glob
+import os
+
+import streamlit as st
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Streamlit only serves the static/ folder next to the main script
+STATIC_DIR = os.path.join(ROOT, "static")
+STATIC_URL = "app/static"
+
+# Product cards are drawn 300px wide; the extra pixels keep them sharp on HiDPI screens
+THUMB_SIZE = 480
+BANNER_SIZE = 1200
+PRODUCT_FOLDERS = ("Baby", "Skin", "per")
+
+
+def derived_name(path, max_size):
+    stem = os.path.splitext(path.replace("\\", "/"))[0].replace("/", "_")
+    return f"{stem}_{max_size}.jpg"
+
+
+def build_asset(path, max_size, quality=82):
+    """Resized JPEG of `path` in static/, rebuilt only when the source is newer."""
+    source = os.path.join(ROOT, path)
+    name = derived_name(path, max_size)
+    target = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(source):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        with Image.open(source) as image:
+            image = image.convert("RGB")
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            image.save(tmp, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(tmp, target)
+    return name
+
+
+# Keyed on the source mtime, so an edited image gets a fresh entry
+@functools.lru_cache(maxsize=256)
+def _asset_url(path, mtime, max_size, static_serving):
+    name = build_asset(path, max_size)
+    if static_serving:
+        # The source mtime busts browser caches when the image changes
+        return f"{STATIC_URL}/{name}?v={int(mtime)}"
+    with open(os.path.join(STATIC_DIR, name), "rb") as f:
+        return "data:image/jpeg;base64," + base64.b64encode(f.read()).decode()
+
+
+def asset_url(path, max_size=THUMB_SIZE):
+    """URL for an image relative to the repo root, or "" if it does not exist.
+
+    Costs one stat() per call once the derived file is built.
+    """
+    try:
+        mtime = os.path.getmtime(os.path.join(ROOT, path))
+    except OSError:
+        return ""
+    return _asset_url(path, mtime, max_size, bool(st.get_option("server.enableStaticServing")))
+
+
+def main():
+    sources = [("banner.png", BANNER_SIZE)] + [
+        (os.path.relpath(p, ROOT), THUMB_SIZE)
+        for folder in PRODUCT_FOLDERS
+        for p in sorted(glob.glob(os.path.join(ROOT, folder, "*.jpg")))
+    ]
+    for path, max_size in sources:
+        name = build_asset(path, max_size)
+        before = os.path.getsize(os.path.join(ROOT, path))
+        after = os.path.getsize(os.path.join(STATIC_DIR, name))
+        print(f"{path:16s} {before / 1024:7.0f} KB -> static/{name} {after / 1024:5.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
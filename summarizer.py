@@ -0,0 +1,502 @@
+import argparse
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import inference_backends
+from medicine_catalog import normalize_name
+from metrics import METRICS
+from summary_cache import params_key
+
+MODEL_NAME = "google/flan-t5-base"
+
+# template  compose summaries from the record fields, no model call (default)
+# rephrase  flan-t5 rewords the template; output that breaks the contract falls back to it
+# generate  flan-t5 writes the summary from the prompt variants below
+SUMMARY_MODE = os.environ.get("MEDIBOT_SUMMARY_MODE", "template")
+
+GENERATION_KWARGS = dict(
+    max_length=320,
+    num_beams=5,
+    no_repeat_ngram_size=3,
+    repetition_penalty=1.2,
+    early_stopping=True,
+)
+
+# --- Templates ---
+
+def _clause(text):
+    text = " ".join((text or "").split()).rstrip(" .;,")
+    # "Treatment of ..." reads as "used for treatment of ...", acronyms like "GERD" stay
+    if len(text) > 1 and text[0].isupper() and text[1].islower():
+        text = text[0].lower() + text[1:]
+    return text
+
+
+def _sentence(text):
+    text = " ".join((text or "").split()).rstrip(" .;,")
+    return text[:1].upper() + text[1:]
+
+
+def brief_template(item):
+    parts = [item["Drug Name"].strip()]
+    if item["Company Name"].strip():
+        parts.append(f"by {item['Company Name'].strip()}")
+    if item["Active Ingredient"].strip():
+        parts.append(f"contains {_sentence(item['Active Ingredient'])}")
+    else:
+        parts.append("is a medicine")
+    text = " ".join(parts) + "."
+    if item["Indication"].strip():
+        text += f" It is used for {_clause(item['Indication'])}."
+    if item["Use in pregnancy"].strip():
+        text += f" Use in pregnancy: {_sentence(item['Use in pregnancy'])}."
+    else:
+        text += " No pregnancy safety information is listed; ask a doctor or pharmacist."
+    return text
+
+
+def detailed_template(item):
+    text = brief_template(item)
+    if item["Dosage and Administration"].strip():
+        text += f" Dosage: {_sentence(item['Dosage and Administration'])}."
+    if item["Side Effects"].strip():
+        text += f" Possible side effects include {_clause(item['Side Effects'])}."
+    return text
+
+
+# Summaries composed from the record alone, the same text for the same record every time
+TEMPLATES = {
+    "brief-template": brief_template,
+    "detailed-template": detailed_template,
+}
+
+# --- Prompt variants ---
+# "brief-*" are the short card prompts used by app.py,
+# "detailed-*" the full-record prompts used by flaskapp.py.
+PROMPTS = {
+    "brief-uses": lambda item: (
+        f"Write a medical summary for {item['Drug Name']} by {item['Company Name']}. Include uses and pregnancy safety: {item['Indication']}. Safety: {item['Use in pregnancy']}"
+    ),
+    "brief-summary": lambda item: (
+        f"Summarize this medicine: {item['Drug Name']}. Indication: {item['Indication']}. Side effects: {item['Side Effects']}. Pregnancy: {item['Use in pregnancy']}"
+    ),
+    "detailed-fields": lambda item: (
+        f"Write a medical summary for the following drug in one clear paragraph. "
+        f"Be sure to include what it's used for and if it's safe during pregnancy:\n"
+        f"- Drug Name: {item['Drug Name']}\n"
+        f"- Company Name: {item['Company Name']}\n"
+        f"- Active Ingredient: {item['Active Ingredient']}\n"
+        f"- Indication: {item['Indication']}\n"
+        f"- Dosage and Administration: {item['Dosage and Administration']}\n"
+        f"- Side Effects: {item['Side Effects']}\n"
+        f"- Use in pregnancy: {item['Use in pregnancy']}\n"
+    ),
+    "detailed-pipes": lambda item: (
+        f"Summarize the medicine below in a paragraph. Be sure to mention its use and pregnancy safety:\n"
+        f"Drug: {item['Drug Name']} | Company: {item['Company Name']} | Ingredient: {item['Active Ingredient']} | "
+        f"Indication: {item['Indication']} | Dosage: {item['Dosage and Administration']} | "
+        f"Side Effects: {item['Side Effects']} | Pregnancy: {item['Use in pregnancy']}."
+    ),
+    "detailed-prose": lambda item: (
+        f"Create a brief but complete medical description of this drug, and ensure that indication and pregnancy use are included:\n"
+        f"{item['Drug Name']} by {item['Company Name']} contains {item['Active Ingredient']}. "
+        f"It is used for {item['Indication']}. "
+        f"Recommended dosage is {item['Dosage and Administration']}. "
+        f"Possible side effects include {item['Side Effects']}. "
+        f"Pregnancy safety: {item['Use in pregnancy']}."
+    ),
+    # Rewording passes over the templates; the output is checked by validate_summary
+    "brief-rephrase": lambda item: (
+        f"Rewrite this medicine summary in plain, friendly words. Keep every fact and number, "
+        f"add nothing new:\n{brief_template(item)}"
+    ),
+    "detailed-rephrase": lambda item: (
+        f"Rewrite this medicine summary as one clear paragraph in plain words. Keep every fact, "
+        f"dose and number, add nothing new:\n{detailed_template(item)}"
+    ),
+}
+VARIANTS = tuple(TEMPLATES) + tuple(PROMPTS)
+
+MODE_VARIANTS = {
+    "template": {"brief": ("brief-template",), "detailed": ("detailed-template",)},
+    "rephrase": {"brief": ("brief-rephrase",), "detailed": ("detailed-rephrase",)},
+    "generate": {"brief": ("brief-uses", "brief-summary"),
+                 "detailed": ("detailed-fields", "detailed-pipes", "detailed-prose")},
+}
+if SUMMARY_MODE not in MODE_VARIANTS:
+    raise ValueError(f"Unknown MEDIBOT_SUMMARY_MODE '{SUMMARY_MODE}', expected one of {sorted(MODE_VARIANTS)}")
+BRIEF_VARIANTS = MODE_VARIANTS[SUMMARY_MODE]["brief"]
+DETAILED_VARIANTS = MODE_VARIANTS[SUMMARY_MODE]["detailed"]
+# The template each model-written variant falls back to when its output is rejected
+FALLBACKS = {variant: f"{variant.split('-')[0]}-template" for variant in PROMPTS}
+# TextIteratorStreamer only works with a single hypothesis, so streaming is greedy
+STREAMING_KWARGS = dict(num_beams=1, early_stopping=False)
+# Seconds a stream may go without a new token before it is abandoned
+STREAM_TIMEOUT = float(os.environ.get("MEDIBOT_STREAM_TIMEOUT", "120"))
+# Regeneration samples a few candidates from one encoder pass instead of re-running beam search
+SAMPLING_KWARGS = dict(do_sample=True, top_p=0.9, temperature=0.8, num_beams=1, early_stopping=False)
+REGENERATE_CANDIDATES = 4
+
+# Model-written variants only; templates need no pre-generation
+VARIANT_SETS = {
+    "all": tuple(PROMPTS),
+    "brief": tuple(v for v in PROMPTS if v.startswith("brief-")),
+    "detailed": tuple(v for v in PROMPTS if v.startswith("detailed-")),
+    "rephrase": ("brief-rephrase", "detailed-rephrase"),
+}
+
+
+def build_prompt(item, variant):
+    with METRICS.stage("prompt"):
+        return PROMPTS[variant](item)
+
+
+def compose_summary(item, variant):
+    """The template text for `variant`, or for the template a model variant falls back to."""
+    with METRICS.stage("prompt"):
+        return TEMPLATES[FALLBACKS.get(variant, variant)](item)
+
+
+def pick_variant(variants, item):
+    """One of `variants`, always the same one for the same drug, so repeat requests hit the cache."""
+    return variants[zlib.crc32(normalize_name(item["Drug Name"]).encode("utf-8")) % len(variants)]
+
+
+# Part of the cache fingerprint: bump when validate_summary changes, so summaries
+# cached or pre-generated under the old rules are not served
+CONTRACT_VERSION = 1
+
+_WORD = re.compile(r"[a-z]+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def validate_summary(text, item, variant):
+    """Output contract for model-written summaries; the rules broken, empty when it holds.
+
+    The text has to name the drug, mention pregnancy, stay within a sane
+    length of the template, not repeat a sentence, and not contain a number
+    that is missing from the prompt, so a dose can never be invented.
+    """
+    problems = []
+    lowered = text.lower()
+    name = _WORD.findall(item["Drug Name"].lower())
+    if name and name[0] not in lowered:
+        problems.append("drug name")
+    if "pregnan" not in lowered:
+        problems.append("pregnancy")
+    reference = len(TEMPLATES[FALLBACKS[variant]](item).split())
+    if not 0.4 * reference <= len(text.split()) <= 2 * reference + 20:
+        problems.append("length")
+    sentences = [s.strip().lower() for s in _SENTENCE_END.split(text) if s.strip()]
+    if len(set(sentences)) < len(sentences):
+        problems.append("repetition")
+    if set(_NUMBER.findall(text)) - set(_NUMBER.findall(PROMPTS[variant](item))):
+        problems.append("numbers")
+    return problems
+
+
+def length_buckets(prompts, tokenizer, batch_size):
+    """Group prompt indices into batches of similar token length to minimise padding."""
+    lengths = [len(ids) for ids in tokenizer(list(prompts), truncation=True).input_ids]
+    order = sorted(range(len(prompts)), key=lambda i: lengths[i])
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def generation_params(model_name=MODEL_NAME, backend=None, **generation_kwargs):
+    """Cache-key fingerprint for a model + backend + generation settings + output contract combination."""
+    backend = backend or inference_backends.BACKEND
+    return params_key(dict(GENERATION_KWARGS, **generation_kwargs, model=model_name, backend=backend,
+                           contract=CONTRACT_VERSION))
+
+
+def load_tokenizer(model_name=MODEL_NAME):
+    from transformers import T5Tokenizer
+
+    return T5Tokenizer.from_pretrained(model_name)
+
+
+def load_model(model_name=MODEL_NAME, backend=None):
+    """Tokenizer plus the model for the configured (or given) inference backend."""
+    return load_tokenizer(model_name), inference_backends.load(model_name, backend)
+
+
+class Summarizer:
+    """flan-t5 summary generation with pre-generated and cached summaries in front of it."""
+
+    def __init__(self, tokenizer, model, cache=None, pregenerated=None, model_name=MODEL_NAME,
+                 backend=None, loader=None, **generation_kwargs):
+        self.tokenizer = tokenizer
+        self.model = model
+        # Optional () -> (tokenizer, model) run on the first generation, so cached
+        # and pre-generated summaries are served while the model is still loading
+        self.loader = loader
+        self.cache = cache
+        # Read-only summaries produced offline by batch_summaries.py
+        self.pregenerated = pregenerated or {}
+        self.generation_kwargs = dict(GENERATION_KWARGS, **generation_kwargs)
+        self.backend = backend or inference_backends.BACKEND
+        self.params = generation_params(model_name, self.backend, **generation_kwargs)
+        self.stream_kwargs = dict(self.generation_kwargs, **STREAMING_KWARGS)
+        self.stream_params = generation_params(
+            model_name, self.backend, **dict(generation_kwargs, **STREAMING_KWARGS)
+        )
+        self.sample_kwargs = dict(self.generation_kwargs, **SAMPLING_KWARGS)
+        # prompt -> (attention mask, encoder hidden states) for repeat regenerations
+        self._encoded = OrderedDict()
+        self._encoded_lock = threading.Lock()
+
+    def ensure_loaded(self):
+        if self.model is None and self.loader is not None:
+            self.tokenizer, self.model = self.loader()
+
+    def generate_summary_text(self, prompt):
+        self.ensure_loaded()
+        with METRICS.stage("generate"):
+            input_ids = self.tokenizer(prompt, return_tensors="pt", truncation=True).input_ids
+            output_ids = self.model.generate(input_ids, **self.generation_kwargs)
+            return self.tokenizer.decode(output_ids[0], skip_special_tokens=True)
+
+    def generate_batch(self, prompts):
+        """One padded model.generate call for several prompts, outputs in input order."""
+        self.ensure_loaded()
+        with METRICS.stage("generate"):
+            encoded = self.tokenizer(list(prompts), return_tensors="pt", padding=True, truncation=True)
+            output_ids = self.model.generate(
+                input_ids=encoded.input_ids,
+                attention_mask=encoded.attention_mask,
+                **self.generation_kwargs,
+            )
+            return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+    def encode(self, prompt, keep=32):
+        """generate() inputs for `prompt` with the encoder already run, reused on later calls.
+
+        Every backend in inference_backends has get_encoder() (ORTModelForSeq2SeqLM runs its
+        ONNX encoder session through it); a model without one gets the token ids instead.
+        """
+        with self._encoded_lock:
+            encoded = self._encoded.get(prompt)
+            if encoded is not None:
+                self._encoded.move_to_end(prompt)
+        if encoded is None:
+            inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True)
+            if hasattr(self.model, "get_encoder"):
+                import torch
+
+                with torch.inference_mode():
+                    hidden = self.model.get_encoder()(
+                        input_ids=inputs.input_ids, attention_mask=inputs.attention_mask
+                    ).last_hidden_state
+                encoded = (inputs.attention_mask, "encoder_outputs", hidden)
+            else:
+                encoded = (inputs.attention_mask, "input_ids", inputs.input_ids)
+            with self._encoded_lock:
+                self._encoded[prompt] = encoded
+                while len(self._encoded) > keep:
+                    self._encoded.popitem(last=False)
+        attention_mask, name, tensor = encoded
+        if name == "encoder_outputs":
+            from transformers.modeling_outputs import BaseModelOutput
+
+            # A fresh wrapper each call: generate() expands encoder_outputs in place
+            tensor = BaseModelOutput(last_hidden_state=tensor)
+        return {"attention_mask": attention_mask, name: tensor}
+
+    def generate_candidates(self, prompt, n=REGENERATE_CANDIDATES):
+        """`n` sampled outputs for one prompt from a single generate call and encoder pass."""
+        self.ensure_loaded()
+        with METRICS.stage("generate"):
+            output_ids = self.model.generate(**self.encode(prompt), num_return_sequences=n, **self.sample_kwargs)
+            return self.tokenizer.batch_decode(output_ids, skip_special_tokens=True)
+
+    def stream_summary_text(self, prompt, stats=None):
+        """Yield the growing summary text as greedy decoding produces tokens.
+
+        generate() runs on a worker thread feeding a TextIteratorStreamer. An
+        exception in generate() is re-raised here, and a stall of more than
+        STREAM_TIMEOUT seconds between tokens raises TimeoutError. If a
+        `stats` dict is passed it receives time-to-first-token, token count and
+        tokens/sec once the stream is exhausted.
+        """
+        from transformers import TextIteratorStreamer
+
+        self.ensure_loaded()
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True,
+                                        timeout=STREAM_TIMEOUT)
+        input_ids = self.tokenizer(prompt, return_tensors="pt", truncation=True).input_ids
+        failure = []
+
+        def run():
+            try:
+                self.model.generate(input_ids=input_ids, streamer=streamer, **self.stream_kwargs)
+            except BaseException as e:
+                failure.append(e)
+            finally:
+                # Without this a failed generate leaves the consumer waiting for tokens forever
+                streamer.end()
+
+        worker = threading.Thread(target=run, daemon=True)
+        start = time.perf_counter()
+        first_token = None
+        text = ""
+        worker.start()
+        try:
+            for chunk in streamer:
+                if first_token is None:
+                    first_token = time.perf_counter() - start
+                text += chunk
+                yield text
+        except queue.Empty:
+            raise TimeoutError(f"No token from generate() for {STREAM_TIMEOUT:g}s") from None
+        worker.join()
+        if failure:
+            raise failure[0]
+        elapsed = time.perf_counter() - start
+        METRICS.observe("generate", elapsed)
+        METRICS.observe("generate_first_token", first_token if first_token is not None else elapsed)
+
+        if stats is not None:
+            tokens = len(self.tokenizer(text, add_special_tokens=False).input_ids)
+            stats.update(
+                ttft=first_token if first_token is not None else elapsed,
+                tokens=tokens,
+                seconds=elapsed,
+                tokens_per_sec=tokens / elapsed if elapsed else 0.0,
+            )
+
+    def cached(self, item, variant, params=None):
+        if variant in TEMPLATES:
+            return compose_summary(item, variant)
+        key = (normalize_name(item["Drug Name"]), variant, params or self.params)
+        if key in self.pregenerated:
+            METRICS.inc("cache_hits_total", cache="pregenerated")
+            return self.pregenerated[key]
+        if self.cache is None:
+            return None
+        summary = self.cache.get(*key)
+        if summary is not None:
+            METRICS.inc("cache_hits_total", cache="summary")
+        return summary
+
+    def store(self, item, variant, summary, params=None):
+        if self.cache is not None:
+            self.cache.put(normalize_name(item["Drug Name"]), variant, params or self.params, summary)
+
+    def accept(self, item, variant, summary):
+        """`summary` if it keeps the output contract, otherwise the variant's template."""
+        problems = validate_summary(summary, item, variant)
+        if not problems:
+            return summary
+        METRICS.inc("summaries_rejected_total", reason=problems[0])
+        return compose_summary(item, variant)
+
+    def summarize(self, item, variant):
+        summary = self.cached(item, variant)
+        if summary is None:
+            METRICS.inc("cache_misses_total", cache="summary")
+            summary = self.accept(item, variant, self.generate_summary_text(build_prompt(item, variant)))
+            self.store(item, variant, summary)
+        return summary
+
+    def regenerate(self, item, variant, old_summary):
+        """A different wording of the summary for the regenerate button, from one generate call.
+
+        Template variants are reworded through their rephrase prompt. The
+        candidates are sampled from a single encoder pass, kept for the next
+        click on the same drug; the first one that keeps the output contract
+        and differs from `old_summary` wins. None when no candidate does, so
+        the caller can say the summary is unchanged instead of repeating it.
+        """
+        if variant in TEMPLATES:
+            variant = variant.replace("-template", "-rephrase")
+        METRICS.inc("regeneration_attempts_total")
+        for candidate in self.generate_candidates(build_prompt(item, variant)):
+            if candidate.strip() != old_summary.strip() and not validate_summary(candidate, item, variant):
+                return candidate
+        METRICS.inc("summaries_rejected_total", reason="regenerate")
+        return None
+
+    def buckets(self, prompts, batch_size):
+        self.ensure_loaded()
+        return length_buckets(prompts, self.tokenizer, batch_size)
+
+    def summarize_many(self, items, variants, batch_size=4):
+        """Yield (index, summary) for every item, cached ones first.
+
+        Misses are padded together in length buckets and decoded with one
+        model.generate call per bucket, so each bucket's cards can be filled
+        in as soon as it finishes instead of after the whole prescription.
+        """
+        pending = []
+        for i, (item, variant) in enumerate(zip(items, variants)):
+            summary = self.cached(item, variant)
+            if summary is None:
+                pending.append((i, build_prompt(item, variant)))
+            else:
+                yield i, summary
+        if not pending:
+            return
+        # Misses are counted where they cost a generate call, not on every lookup
+        METRICS.inc("cache_misses_total", len(pending), cache="summary")
+        for bucket in self.buckets([prompt for _, prompt in pending], batch_size):
+            batch = [pending[j] for j in bucket]
+            summaries = self.generate_batch([prompt for _, prompt in batch])
+            for (i, _), summary in zip(batch, summaries):
+                summary = self.accept(items[i], variants[i], summary)
+                self.store(items[i], variants[i], summary)
+                yield i, summary
+
+    def stream_summarize(self, item, variant, stats=None):
+        """Like summarize(), but yields partial text; cached summaries arrive in one piece."""
+        summary = self.cached(item, variant) or self.cached(item, variant, self.stream_params)
+        if summary is not None:
+            yield summary
+            return
+        METRICS.inc("cache_misses_total", cache="summary")
+        summary = ""
+        for summary in self.stream_summary_text(build_prompt(item, variant), stats):
+            yield summary
+        final = self.accept(item, variant, summary)
+        if final != summary:
+            # Rejected: the streamed text is replaced by the template
+            yield final
+        self.store(item, variant, final, self.stream_params)
+
+    def prewarm(self, items, variants, progress=None):
+        """Fill the cache for every (item, variant) pair that is not cached yet."""
+        done = 0
+        for item in items:
+            for variant in variants:
+                if self.cached(item, variant) is None:
+                    self.summarize(item, variant)
+                    done += 1
+            if progress:
+                progress(item)
+        return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-warm the Medi-Bot summary cache from the catalog.")
+    parser.add_argument("--variants", default="all", choices=sorted(VARIANT_SETS))
+    parser.add_argument("--limit", type=int, default=None, help="only the first N catalog records")
+    args = parser.parse_args()
+
+    from medicine_catalog import MedicineCatalog
+    from summary_cache import SummaryCache
+
+    variants = VARIANT_SETS[args.variants]
+    items = list(MedicineCatalog.from_json().by_name.values())[: args.limit]
+    tokenizer, model = load_model()
+    summarizer = Summarizer(tokenizer, model, SummaryCache())
+    count = summarizer.prewarm(items, variants, progress=lambda item: print(item["Drug Name"]))
+    print(f"Generated {count} summaries.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_FILE = os.environ.get("MEDIBOT_SUMMARY_CACHE", "summary_cache.sqlite3")
+ARTIFACT_FILE = os.environ.get("MEDIBOT_SUMMARY_ARTIFACT", "pregenerated_summaries.jsonl")
+
+
+def params_key(params):
+    # Stable short fingerprint of model name + generation kwargs
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+class SummaryCache:
+    """Two-level LRU cache of generated summaries.
+
+    A small in-process OrderedDict sits in front of a SQLite table, so repeat
+    lookups in one process are dict hits while every session, replica and
+    restart shares the on-disk entries. Entries are keyed by normalized drug
+    name, prompt variant and a fingerprint of the generation parameters.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=20000, memory_entries=512):
+        self.path = path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS summaries (
+                drug TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                params TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (drug, variant, params)
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS summaries_lru ON summaries (last_used)")
+        self._db.commit()
+
+    def get(self, drug, variant, params):
+        key = (drug, variant, params)
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+            row = self._db.execute(
+                "SELECT summary FROM summaries WHERE drug=? AND variant=? AND params=?", key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE summaries SET last_used=? WHERE drug=? AND variant=? AND params=?",
+                (time.time(),) + key,
+            )
+            self._db.commit()
+            self._remember(key, row[0])
+            self.hits += 1
+            return row[0]
+
+    def put(self, drug, variant, params, summary):
+        self.put_many([(drug, variant, params, summary)])
+
+    def put_many(self, entries):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)",
+                [(d, v, p, s, now) for d, v, p, s in entries],
+            )
+            self._evict()
+            self._db.commit()
+            for d, v, p, s in entries:
+                self._remember((d, v, p), s)
+
+    def invalidate(self, drug):
+        """Drop every cached summary for one drug (all variants and params)."""
+        with self._lock:
+            self._db.execute("DELETE FROM summaries WHERE drug=?", (drug,))
+            self._db.commit()
+            for key in [k for k in self.memory if k[0] == drug]:
+                del self.memory[key]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def _remember(self, key, summary):
+        self.memory[key] = summary
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        count = self._db.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        if count > self.max_entries:
+            self._db.execute(
+                "DELETE FROM summaries WHERE rowid IN "
+                "(SELECT rowid FROM summaries ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+
+def load_artifact(path=ARTIFACT_FILE):
+    """{(drug, variant, params): summary} from a batch_summaries.py JSONL artifact."""
+    summaries = {}
+    if not os.path.exists(path):
+        return summaries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                # A run killed mid-write can leave a truncated last line
+                continue
+            summaries[(row["drug"], row["variant"], row["params"])] = row["summary"]
+    return summaries
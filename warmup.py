@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+import streamlit as st
+
+from model_server import MODEL_SERVER, RemoteSummarizer
+from ocr_service import get_ocr_service
+from semantic_search import get_encoder, get_search_index
+from summarizer import SUMMARY_MODE, Summarizer, load_model
+from summary_cache import ARTIFACT_FILE, CACHE_FILE, SummaryCache, load_artifact
+
+# MEDIBOT_WARMUP=0 loads models on first use instead of in the background
+WARMUP = os.environ.get("MEDIBOT_WARMUP", "1") != "0"
+
+
+class Warmup:
+    """Runs slow loaders (models, OCR reader) on background threads.
+
+    The page renders straight away; callers that need a resource block in
+    get() only if it is still loading. status() drives the readiness badge.
+    """
+
+    def __init__(self, tasks, background=WARMUP, lazy=()):
+        self.tasks = dict(tasks)
+        self.results = {}
+        self.errors = {}
+        self.seconds = {}
+        self._done = {name: threading.Event() for name in self.tasks}
+        self._started = set()
+        self._lock = threading.Lock()
+        if background:
+            # `lazy` tasks load on their first get() instead of at boot
+            for name in self.tasks:
+                if name not in lazy:
+                    self.start(name)
+
+    def start(self, name):
+        with self._lock:
+            if name in self._started:
+                return
+            self._started.add(name)
+        threading.Thread(target=self._run, args=(name,), name=f"warmup-{name}", daemon=True).start()
+
+    def _run(self, name):
+        start = time.perf_counter()
+        try:
+            self.results[name] = self.tasks[name]()
+        except Exception as e:
+            self.errors[name] = e
+        self.seconds[name] = time.perf_counter() - start
+        self._done[name].set()
+
+    def ready(self, name=None):
+        # A task this process does not run (e.g. "model" with a model server) is never waited for
+        names = [name] if name else list(self.tasks)
+        return all(self._done[n].is_set() for n in names if n in self._done)
+
+    def get(self, name, timeout=None):
+        self.start(name)
+        if not self._done[name].wait(timeout):
+            raise TimeoutError(f"{name} is still loading")
+        if name in self.errors:
+            raise self.errors[name]
+        return self.results[name]
+
+    def status(self):
+        return {
+            name: ("failed" if name in self.errors
+                   else "ready" if self._done[name].is_set()
+                   else "loading" if name in self._started
+                   else "idle")
+            for name in self.tasks
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def get_warmup():
+    """Process-wide warmup, started by the first session that renders a page."""
+    tasks = {"ocr": get_ocr_service().warm}
+    if not MODEL_SERVER:
+        # Thin clients leave flan-t5 to the model server
+        tasks["model"] = load_model
+    try:
+        index = get_search_index()
+    except Exception:
+        # An unreadable index leaves condition search off; app.py reports it on use
+        index = None
+    if index is not None:
+        # The query encoder is only useful once the condition search index is built
+        tasks["search"] = lambda: get_encoder(index.model_name)
+    # Template summaries need flan-t5 only for the regenerate button
+    return Warmup(tasks, lazy={"model"} if SUMMARY_MODE == "template" else ())
+
+
+@st.cache_resource(show_spinner=False)
+def get_summary_cache(path=CACHE_FILE):
+    return SummaryCache(path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_pregenerated(path=ARTIFACT_FILE):
+    return load_artifact(path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_summarizer(_warmup=None):
+    """Process-wide summarizer; a local one only blocks on the model when it must generate.
+
+    One instance across reruns keeps its encoder outputs for repeat
+    regenerations and makes a thin client's /health call only once.
+    """
+    if MODEL_SERVER:
+        return RemoteSummarizer(MODEL_SERVER, get_summary_cache(), get_pregenerated())
+    warmup = _warmup or get_warmup()
+    return Summarizer(None, None, get_summary_cache(), get_pregenerated(),
+                      loader=lambda: warmup.get("model"))
+
+
+LABELS = {"model": "AI model", "ocr": "OCR reader", "search": "Condition search"}
+ICONS = {"ready": "🟢", "loading": "⏳", "failed": "🔴", "idle": "⚪"}
+
+
+def readiness_badge(warmup):
+    """Small status line that polls until every background load has finished."""
+    loading = "loading" in warmup.status().values()
+
+    @st.fragment(run_every=2 if loading else None)
+    def badge():
+        st.caption(" · ".join(
+            f"{ICONS[state]} {LABELS.get(name, name)} {state}" for name, state in warmup.status().items()
+        ))
+
+    badge()